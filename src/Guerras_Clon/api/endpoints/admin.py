@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
+from sqlalchemy import tuple_
 from typing import List
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from src.Guerras_Clon.bd import models
 from src.Guerras_Clon.security import security
-from src.Guerras_Clon.bd.database import get_db
+from src.Guerras_Clon.bd.database import get_db, get_read_db
 from src.Guerras_Clon.security.auditing import create_audit_log
+from src.Guerras_Clon.services import stats_service, tournament_cache_service
 
 router = APIRouter()
 
@@ -25,23 +27,70 @@ class AuditLogResponse(BaseModel):
         from_attributes = True
 
 
+class ActividadResponse(BaseModel):
+    hour: datetime
+    action: str
+    count: int
+
+    class Config:
+
+        from_attributes = True
+
+
+def codificar_cursor(log: models.AuditLog) -> str:
+    return base64.urlsafe_b64encode(f"{log.timestamp.isoformat()}|{log.id}".encode()).decode()
+
+
+def decodificar_cursor(cursor: str) -> (datetime, int):
+    try:
+        timestamp, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(log_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
 @router.get(
     "/logs",
     response_model=List[AuditLogResponse],
     dependencies=[Depends(security.get_current_admin_user)]  # ¡PROTEGIDO!
 )
 async def get_audit_logs(
-        skip: int = 0,
-        limit: int = 100,
-        db: AsyncSession = Depends(get_db)
+        response: Response,
+        cursor: str | None = None,
+        limit: int = Query(100, ge=1, le=500),
+        username: str | None = None,
+        action: str | None = None,
+        desde: datetime | None = None,
+        hasta: datetime | None = None,
+        skip: int = Query(0, ge=0, deprecated=True),
+        db: AsyncSession = Depends(get_read_db)
 ):
+    """
+    Registros del más reciente al más antiguo, paginados por cursor sobre (timestamp, id).
+    Si hay más páginas, la cabecera X-Next-Cursor trae el cursor de la siguiente.
+    """
+    query = select(models.AuditLog)
+    if username:
+        query = query.where(models.AuditLog.username == username)
+    if action:
+        query = query.where(models.AuditLog.action == action)
+    if desde:
+        query = query.where(models.AuditLog.timestamp >= desde)
+    if hasta:
+        query = query.where(models.AuditLog.timestamp < hasta)
+    if cursor:
+        query = query.where(tuple_(models.AuditLog.timestamp, models.AuditLog.id) < tuple_(*decodificar_cursor(cursor)))
+    elif skip:
+        query = query.offset(skip)
+
     result = await db.execute(
-        select(models.AuditLog)
-        .order_by(models.AuditLog.timestamp.desc())
-        .offset(skip)
-        .limit(limit)
+        query.order_by(models.AuditLog.timestamp.desc(), models.AuditLog.id.desc()).limit(limit + 1)
     )
     logs = result.scalars().all()
+
+    if len(logs) > limit:
+        logs = logs[:limit]
+        response.headers["X-Next-Cursor"] = codificar_cursor(logs[-1])
     return logs
 
 
@@ -50,20 +99,33 @@ async def get_audit_logs(
     response_model=dict,
     dependencies=[Depends(security.get_current_admin_user)]  # ¡PROTEGIDO!
 )
-async def get_app_stats(db: AsyncSession = Depends(get_db)):
-    user_count_result = await db.execute(select(func.count(models.User.id)))
-    total_users = user_count_result.scalar()
-
-    logs_count_result = await db.execute(select(func.count(models.AuditLog.id)))
-    total_logs = logs_count_result.scalar()
+async def get_app_stats(db: AsyncSession = Depends(get_read_db)):
+    contadores = await stats_service.obtener_contadores(db)
 
     return {
-        "total_users": total_users,
-        "total_audit_logs": total_logs,
+        "total_users": contadores.get(stats_service.CONTADOR_USUARIOS, 0),
+        "total_audit_logs": contadores.get(stats_service.CONTADOR_AUDITORIA, 0),
         "prometheus_metrics_available_at": "/metrics"
     }
 
 
+@router.get(
+    "/activity",
+    response_model=List[ActividadResponse],
+    dependencies=[Depends(security.get_current_admin_user)]  # ¡PROTEGIDO!
+)
+async def get_activity(
+        desde: datetime | None = None,
+        hasta: datetime | None = None,
+        action: str | None = None,
+        db: AsyncSession = Depends(get_read_db)
+):
+    """Eventos de auditoría por hora y acción; por defecto, las últimas 24 horas."""
+    hasta = hasta or datetime.now(timezone.utc)
+    desde = desde or hasta - timedelta(hours=24)
+    return await stats_service.obtener_actividad(db, desde, hasta, action)
+
+
 @router.post(
     "/promote_user/{username}",
     response_model=security.UserResponse,
@@ -79,5 +141,7 @@ async def promote_user_to_admin(username: str, db: AsyncSession = Depends(get_db
     await create_audit_log(db, "admin", "PROMOTE_USER", f"User {username} promoted to admin")
     await db.commit()
     await db.refresh(user)
+    security.invalidar_usuario(username)
+    tournament_cache_service.vaciar()
 
     return user
@@ -7,6 +7,7 @@ from datetime import timedelta, datetime, timezone
 from src.Guerras_Clon.bd import models
 from src.Guerras_Clon.security import security
 from src.Guerras_Clon.security.auditing import create_audit_log
+from src.Guerras_Clon.services import stats_service, tournament_cache_service
 from src.Guerras_Clon.bd.database import get_db
 from pydantic import BaseModel, EmailStr
 import random
@@ -114,7 +115,7 @@ async def request_registration(
     existing_code_stmt = delete(models.VerificationCode).where(models.VerificationCode.email == user_in.email)
     await db.execute(existing_code_stmt)
 
-    hashed_password = security.get_password_hash(user_in.password)
+    hashed_password = await security.get_password_hash_async(user_in.password)
     code = generate_verification_code()
     expires_at = datetime.now(timezone.utc) + timedelta(minutes=20)
 
@@ -164,6 +165,7 @@ async def verify_registration(
     await db.delete(pending_user)
 
     await create_audit_log(db, new_user.username, "USER_REGISTER", "Success")
+    await stats_service.incrementar(db, stats_service.CONTADOR_USUARIOS)
     await db.commit()
     await db.refresh(new_user)
 
@@ -181,7 +183,7 @@ async def login_for_access_token(
         db: AsyncSession = Depends(get_db)
 ):
     user = await security.get_user(db, username=form_data.username)
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    if not user or not await security.verify_password_async(form_data.password, user.hashed_password):
         await create_audit_log(db, form_data.username, "USER_LOGIN", "Failed: Incorrect username or password")
         await db.commit()
         raise HTTPException(
@@ -206,7 +208,7 @@ async def login_for_access_token(
 
 @router.get("/me", response_model=security.UserResponse)
 async def read_users_me(
-        current_user: models.User = Depends(security.get_current_user)
+        current_user: security.UserResponse = Depends(security.get_current_user)
 ):
     return current_user
 
@@ -215,7 +217,7 @@ async def read_users_me(
 async def update_own_credentials(
         creds: UpdateCredentialsRequest,
         db: AsyncSession = Depends(get_db),
-        current_user: models.User = Depends(security.get_current_user)
+        current_user: security.UserResponse = Depends(security.get_current_user)
 ):
     if not creds.username or not creds.password:
         raise HTTPException(status_code=400, detail="Username and password are required")
@@ -237,20 +239,28 @@ async def update_own_credentials(
         raise HTTPException(status_code=400,
                             detail="Contraseña insegura. Debe tener mín 8 caracteres, 1 mayúscula, 1 minúscula, 1 número y 1 carácter especial.")
 
-    current_user.username = creds.username
-    hashed_password = security.get_password_hash(creds.password)
-    current_user.hashed_password = hashed_password
-    current_user.must_change_password = False
+    # current_user viene de la caché de principales; se modifica el registro de la base de datos.
+    user = await security.get_user(db, username=current_user.username)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    db.add(current_user)
-    await create_audit_log(db, current_user.username, "UPDATE_CREDENTIALS", "Success")
+    user.username = creds.username
+    hashed_password = await security.get_password_hash_async(creds.password)
+    user.hashed_password = hashed_password
+    user.must_change_password = False
+
+    db.add(user)
+    await create_audit_log(db, user.username, "UPDATE_CREDENTIALS", "Success")
     await db.commit()
 
-    await db.refresh(current_user)
+    await db.refresh(user)
+    security.invalidar_usuario(current_user.username)
+    security.invalidar_usuario(user.username)
+    tournament_cache_service.vaciar()
 
     access_token_expires = timedelta(minutes=security.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
-        data={"sub": current_user.username, "role": current_user.role},
+        data={"sub": user.username, "role": user.role},
         expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
@@ -1,18 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import List, Dict, Literal
-from src.Guerras_Clon.api.schemas.star_wars_models import Mundo, Personaje
-from src.Guerras_Clon.services import swapi_service
+from src.Guerras_Clon.api.schemas.star_wars_models import Mundo, Personaje, MatrizMatchupsSchema
+from src.Guerras_Clon.services import swapi_service, matchup_service
 import random
 from pydantic import BaseModel
-from src.Guerras_Clon.services import battle_service
-from src.Guerras_Clon.services.swapi_service import obtener_personajes_por_mundo, DATOS_PERSONAJES
+from src.Guerras_Clon.services import battle_session_service
+from src.Guerras_Clon.services.battle_session_service import SesionBatalla
 from src.Guerras_Clon.security import security
-from src.Guerras_Clon.bd import models
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.Guerras_Clon.bd.database import get_db
+from src.Guerras_Clon.core.http_cache import respuesta_json_cacheada
 
 router = APIRouter()
 
+# Privada porque las rutas exigen sesión; pasado el max-age el cliente revalida con If-None-Match.
+CACHE_CONTROL_CATALOGO = "private, max-age=60"
+
 
 class IniciarBatallaRequest(BaseModel):
     mundo_id: int
@@ -40,115 +43,96 @@ class AccionBatallaRequest(BaseModel):
 
 
 
-batallas_activas: Dict[str, EstadoBatalla] = {}
+batallas_activas = battle_session_service.crear_almacen()
 
 
-@router.get("/mundos", response_model=List[Mundo])
-async def get_mundos(
-        current_user: models.User = Depends(security.get_current_user)  # Añadida seguridad
-):
-    return await swapi_service.obtener_mundos_clon()
+def _a_estado_batalla(sesion: SesionBatalla, jugador: Personaje, oponente: Personaje) -> EstadoBatalla:
+    return EstadoBatalla(
+        id_batalla=sesion.id_batalla,
+        jugador=PersonajeEnBatalla(
+            personaje=jugador,
+            hp_actual=sesion.hp_jugador,
+            especial_usado=sesion.especial_jugador,
+            es_jugador=True
+        ),
+        oponente=PersonajeEnBatalla(
+            personaje=oponente,
+            hp_actual=sesion.hp_oponente,
+            especial_usado=sesion.especial_oponente
+        ),
+        log_batalla=list(sesion.log),
+        terminada=sesion.terminada
+    )
 
 
-@router.get("/mundos/{mundo_id}/personajes", response_model=Dict[str, List[Personaje]])
-async def get_personajes_por_mundo(
-        mundo_id: int,
-        current_user: models.User = Depends(security.get_current_user)  # Añadida seguridad
-):
-    personajes = await swapi_service.obtener_personajes_por_mundo(mundo_id)
-    if not personajes["heroes"] and not personajes["villanos"]:
+@router.get("/mundos", response_model=List[Mundo], dependencies=[Depends(security.get_token_data)])
+async def get_mundos(request: Request):
+    catalogo = swapi_service.obtener_catalogo()
+    return respuesta_json_cacheada(request, catalogo.json_mundos(), f'"{catalogo.version}"',
+                                   CACHE_CONTROL_CATALOGO)
+
+
+@router.get("/mundos/{mundo_id}/personajes", response_model=Dict[str, List[Personaje]],
+            dependencies=[Depends(security.get_token_data)])
+async def get_personajes_por_mundo(mundo_id: int, request: Request):
+    catalogo = swapi_service.obtener_catalogo()
+    if not catalogo.de_mundo(mundo_id):
         raise HTTPException(status_code=404, detail="Mundo no encontrado o sin personajes")
-    return personajes
+    return respuesta_json_cacheada(request, catalogo.json_personajes_de_mundo(mundo_id),
+                                   f'"{catalogo.version}-{mundo_id}"', CACHE_CONTROL_CATALOGO)
+
+
+@router.get("/matchups", response_model=MatrizMatchupsSchema, dependencies=[Depends(security.get_token_data)])
+async def get_matchups(motor: Literal["exacto", "monte_carlo"] = matchup_service.MOTOR_POR_DEFECTO):
+    return await matchup_service.obtener_matriz_matchups(motor)
 
 
 @router.post("/batalla/iniciar", response_model=EstadoBatalla)
 async def iniciar_batalla(
         request: IniciarBatallaRequest,
-        current_user: models.User = Depends(security.get_current_user)
+        current_user: security.UserResponse = Depends(security.get_current_user)
 ):
-    personajes_mundo = await obtener_personajes_por_mundo(request.mundo_id)
+    catalogo = swapi_service.obtener_catalogo()
 
-    jugador_data = next((p for p in DATOS_PERSONAJES if p.id == request.jugador_id), None)
+    jugador_data = catalogo.obtener(request.jugador_id)
     if not jugador_data:
         raise HTTPException(status_code=404, detail="Personaje jugador no encontrado")
 
-    tipo_jugador = jugador_data.tipo
-    lista_oponentes = personajes_mundo["villanos"] if tipo_jugador == "heroe" else personajes_mundo["heroes"]
+    tipo_oponente = "villano" if jugador_data.tipo == "heroe" else "heroe"
+    lista_oponentes = catalogo.seleccion(request.mundo_id, tipo_oponente)
 
     if not lista_oponentes:
         raise HTTPException(status_code=404, detail="No hay oponentes en este mundo")
 
     oponente_data = random.choice(lista_oponentes)
 
-    id_batalla = f"batalla_{random.randint(1000, 9999)}"
-    estado = EstadoBatalla(
-        id_batalla=id_batalla,
-        jugador=PersonajeEnBatalla(
-            personaje=jugador_data,
-            hp_actual=jugador_data.info.defensa,
-            es_jugador=True
-        ),
-        oponente=PersonajeEnBatalla(
-            personaje=oponente_data,
-            hp_actual=oponente_data.info.defensa
-        ),
-        log_batalla=[f"¡Comienza la batalla entre {jugador_data.nombre} y {oponente_data.nombre}!"]
-    )
-
-    batallas_activas[id_batalla] = estado
-    return estado
+    sesion = await batallas_activas.crear(current_user.username, jugador_data, oponente_data)
+    return _a_estado_batalla(sesion, jugador_data, oponente_data)
 
 
 @router.post("/batalla/accion", response_model=EstadoBatalla)
 async def turno_batalla(
         request: AccionBatallaRequest,
-        current_user: models.User = Depends(security.get_current_user)
+        current_user: security.UserResponse = Depends(security.get_current_user)
 ):
-    estado = batallas_activas.get(request.id_batalla)
-    if not estado or estado.terminada:
+    sesion = await batallas_activas.obtener(request.id_batalla)
+    if not sesion or sesion.terminada:
         raise HTTPException(status_code=404, detail="Batalla no encontrada o terminada")
 
-    jugador = estado.jugador
-    oponente = estado.oponente
-    log = estado.log_batalla
-
-    # Comprobar si es el jugador correcto (aunque sin BBDD es simple)
-    if not jugador.es_jugador:
+    if sesion.propietario != current_user.username:
         raise HTTPException(status_code=403, detail="No eres el propietario de esta batalla")
 
-    accion_jugador = request.tipo_accion
-    if accion_jugador == "ataque_especial" and jugador.especial_usado:
-        log.append(f"{jugador.personaje.nombre} intenta usar su ataque especial, ¡pero ya lo ha usado!")
-        accion_jugador = "ataque_normal"
-
-    habilidad_jugador = battle_service.factory_habilidades.get_habilidad(accion_jugador)
-    daño, msg = habilidad_jugador.ejecutar(jugador.personaje, oponente.personaje)
-
-    oponente.hp_actual = max(0, oponente.hp_actual - daño)
-    log.append(msg)
-    if accion_jugador == "ataque_especial":
-        jugador.especial_usado = True
-
-    if oponente.hp_actual <= 0:
-        estado.terminada = True
-        log.append(f"¡{jugador.personaje.nombre} ha ganado la batalla!")
-        return estado
-
-    accion_ia = "ataque_normal"
-    if not oponente.especial_usado and random.random() < 0.5:
-        accion_ia = "ataque_especial"
-        oponente.especial_usado = True
-
-    habilidad_ia = battle_service.factory_habilidades.get_habilidad(accion_ia)
-    daño_ia, msg_ia = habilidad_ia.ejecutar(oponente.personaje, jugador.personaje)
+    catalogo = swapi_service.obtener_catalogo()
+    jugador = catalogo.obtener(sesion.jugador_id)
+    oponente = catalogo.obtener(sesion.oponente_id)
 
-    jugador.hp_actual = max(0, jugador.hp_actual - daño_ia)
-    log.append(msg_ia)
+    battle_session_service.resolver_turno(sesion, jugador, oponente, request.tipo_accion)
+    try:
+        await batallas_activas.guardar(sesion)
+    except battle_session_service.ConflictoSesionError:
+        raise HTTPException(status_code=409, detail="La batalla ha cambiado en otra petición. Vuelve a intentarlo.")
 
-    if jugador.hp_actual <= 0:
-        estado.terminada = True
-        log.append(f"¡{oponente.personaje.nombre} ha ganado la batalla!")
-        return estado
+    if sesion.terminada:
+        await batallas_activas.finalizar(sesion.id_batalla)
 
-    batallas_activas[request.id_batalla] = estado
-    return estado
\ No newline at end of file
+    return _a_estado_batalla(sesion, jugador, oponente)
@@ -1,32 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func  # Modificado: importación moderna de 'select'
-from sqlalchemy.orm import selectinload, joinedload
-from typing import List
-import random
+from sqlalchemy import select, insert  # Modificado: importación moderna de 'select'
+from sqlalchemy.orm import selectinload, lazyload
+from types import SimpleNamespace
+from typing import List, Literal
 from datetime import datetime, timezone
 import logging
 
 from src.Guerras_Clon.bd import models
 from src.Guerras_Clon.security import security
-from src.Guerras_Clon.bd.database import get_db
+from src.Guerras_Clon.bd.database import get_db, get_read_db
+from src.Guerras_Clon.core.http_cache import respuesta_json_cacheada
 from src.Guerras_Clon.api.schemas import star_wars_models as schemas
-from src.Guerras_Clon.services import battle_service, swapi_service
+from src.Guerras_Clon.services import (battle_service, leaderboard_service, swapi_service, tournament_cache_service,
+                                       tournament_service)
 from src.Guerras_Clon.security.auditing import create_audit_log
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-MAX_PARTICIPANTS = 16
-AI_PARTICIPANTS_COUNT = 15
+MAX_PARTICIPANTS = tournament_service.MAX_PARTICIPANTS
+TOTAL_ROUNDS = tournament_service.TOTAL_ROUNDS
+
+# Un cuadro terminado ya no cambia; uno en curso se revalida siempre con If-None-Match.
+CACHE_CONTROL_TORNEO_TERMINADO = "public, max-age=300"
+CACHE_CONTROL_TORNEO_EN_CURSO = "no-cache"
 
 
 async def _inject_character_data_into_schema(tournament: models.Tournament) -> schemas.TournamentSchema:
-    character_ids = {p.character_id for p in tournament.participants}
-    character_map = {}
-    for char_id in character_ids:
-        if char_id not in character_map:
-            character_map[char_id] = await swapi_service.get_character_by_id(char_id)
+    character_map = swapi_service.obtener_catalogo().por_id
 
     participant_map = {}
     for p in tournament.participants:
@@ -56,7 +58,7 @@ async def _inject_character_data_into_schema(tournament: models.Tournament) -> s
 async def create_tournament(
         request: schemas.TournamentCreateRequest,
         db: AsyncSession = Depends(get_db),
-        current_user: models.User = Depends(security.get_current_user)
+        current_user: security.UserResponse = Depends(security.get_current_user)
 ):
     new_tournament = models.Tournament(name=request.name, status="pending")
     db.add(new_tournament)
@@ -67,7 +69,7 @@ async def create_tournament(
 
 
 @router.get("/open", response_model=List[schemas.TournamentSchema])
-async def get_open_tournaments(db: AsyncSession = Depends(get_db)):
+async def get_open_tournaments(db: AsyncSession = Depends(get_read_db)):
     result = await db.execute(
         select(models.Tournament)
         .where(models.Tournament.status == "pending")
@@ -82,33 +84,77 @@ async def get_open_tournaments(db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/leaderboard", response_model=List[schemas.LeaderboardEntrySchema])
-async def get_leaderboard(db: AsyncSession = Depends(get_db)):
-    duration = func.extract('epoch', models.Tournament.end_time - models.Tournament.start_time)
-
-    result = await db.execute(
-        select(
-            models.Tournament.name.label("tournament_name"),
-            models.User.username.label("winner_name"),
-            duration.label("duration_seconds"),
-            models.Tournament.end_time.label("completed_at")
+async def get_leaderboard(window: Literal["day", "week", "all"] = "all", db: AsyncSession = Depends(get_read_db)):
+    return await leaderboard_service.obtener_leaderboard(db, window)
+
+
+async def _usuarios_del_bracket(db: AsyncSession, tournament: models.Tournament) -> dict:
+    """Usuarios humanos del cuadro y el ganador, por id; lo único que no guarda la columna bracket."""
+    participantes, _ = tournament_service.expandir_bracket(tournament.bracket) if tournament.bracket else ([], [])
+    usuarios = {}
+    for user_id in {p["user_id"] for p in participantes if p["user_id"]} | {tournament.winner_id} - {None}:
+        user = await db.get(models.User, user_id)
+        if user:
+            usuarios[user_id] = security.UserResponse.from_orm(user)
+    return usuarios
+
+
+def _schema_desde_bracket(tournament: models.Tournament, usuarios: dict) -> schemas.TournamentSchema:
+    """Construye el detalle desde la columna bracket y los usuarios ya resueltos."""
+    character_map = swapi_service.obtener_catalogo().por_id
+    participantes, partidos = tournament_service.expandir_bracket(tournament.bracket) if tournament.bracket else ([], [])
+
+    participant_map = {
+        p["id"]: schemas.TournamentParticipantSchema(
+            id=p["id"],
+            user=usuarios.get(p["user_id"]),
+            ai_name=p["ai_name"],
+            character_id=p["character_id"],
+            character=character_map.get(p["character_id"])
         )
-        .join(models.User, models.Tournament.winner_id == models.User.id)
-        .where(
-            models.Tournament.status == "completed",
-            models.Tournament.winner_id.isnot(None),
-            models.Tournament.start_time.isnot(None),
-            models.Tournament.end_time.isnot(None)
+        for p in participantes
+    }
+    match_schemas = [
+        schemas.TournamentMatchSchema(
+            id=m["id"],
+            round=m["round"],
+            match_index=m["match_index"],
+            player1=participant_map[m["player1_id"]],
+            player2=participant_map[m["player2_id"]],
+            winner=participant_map.get(m["winner_id"]),
+            status=m["status"]
         )
-        .order_by(duration.asc())
-        .limit(20)
+        for m in partidos
+    ]
+    return schemas.TournamentSchema(
+        id=tournament.id,
+        name=tournament.name,
+        status=tournament.status,
+        winner=usuarios.get(tournament.winner_id),
+        participants=list(participant_map.values()),
+        matches=match_schemas,
+        start_time=tournament.start_time,
+        end_time=tournament.end_time
     )
 
-    leaderboard_entries = result.mappings().all()
-    return leaderboard_entries
-
 
 @router.get("/{tournament_id}", response_model=schemas.TournamentSchema)
-async def get_tournament_details(tournament_id: int, db: AsyncSession = Depends(get_db)):
+async def get_tournament_details(tournament_id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
+    detalle = tournament_cache_service.obtener(tournament_id)
+    if detalle is None:
+        detalle = tournament_cache_service.guardar(await _detalle_torneo(db, tournament_id))
+    cache_control = CACHE_CONTROL_TORNEO_TERMINADO if detalle.terminado else CACHE_CONTROL_TORNEO_EN_CURSO
+    return respuesta_json_cacheada(request, detalle.cuerpo, detalle.etag, cache_control)
+
+
+async def _detalle_torneo(db: AsyncSession, tournament_id: int) -> schemas.TournamentSchema:
+    tournament = await db.get(models.Tournament, tournament_id, options=[lazyload("*")])
+    if not tournament:
+        raise HTTPException(status_code=404, detail="Torneo no encontrado")
+    if tournament.bracket is not None or tournament.status == "pending":
+        return _schema_desde_bracket(tournament, await _usuarios_del_bracket(db, tournament))
+
+    # Torneos empezados antes de existir la columna bracket: se leen de las tablas.
     tournament = await db.get(
         models.Tournament,
         tournament_id,
@@ -120,11 +166,9 @@ async def get_tournament_details(tournament_id: int, db: AsyncSession = Depends(
                 selectinload(models.TournamentMatch.winner).joinedload(models.TournamentParticipant.user),
             ),
             selectinload(models.Tournament.winner)
-        ]
+        ],
+        populate_existing=True
     )
-    if not tournament:
-        raise HTTPException(status_code=404, detail="Torneo no encontrado")
-
     return await _inject_character_data_into_schema(tournament)
 
 
@@ -133,9 +177,9 @@ async def join_and_start_tournament(
         tournament_id: int,
         request: schemas.TournamentJoinRequest,
         db: AsyncSession = Depends(get_db),
-        current_user: models.User = Depends(security.get_current_user)
+        current_user: security.UserResponse = Depends(security.get_current_user)
 ):
-    tournament = await db.get(models.Tournament, tournament_id, options=[selectinload(models.Tournament.participants)])
+    tournament = await db.get(models.Tournament, tournament_id)
     if not tournament:
         raise HTTPException(status_code=404, detail="Torneo no encontrado")
     if tournament.status != "pending":
@@ -152,104 +196,238 @@ async def join_and_start_tournament(
     if not character:
         raise HTTPException(status_code=404, detail="Personaje no encontrado.")
 
-    participant_list = []
-    human_participant = models.TournamentParticipant(
-        tournament_id=tournament_id,
-        user_id=current_user.id,
-        character_id=request.character_id
-    )
-    db.add(human_participant)
-    participant_list.append(human_participant)
-
     await create_audit_log(db, current_user.username, "JOIN_TOURNAMENT",
                            f"Unido a '{tournament.name}' con {character.nombre}")
 
     all_characters = await swapi_service.get_all_characters()
-    available_bots = [c for c in all_characters if c.id != request.character_id]
-
-    if len(available_bots) < AI_PARTICIPANTS_COUNT:
-        raise HTTPException(status_code=500, detail="No hay suficientes personajes únicos para los bots.")
-
-    selected_bots = random.sample(available_bots, AI_PARTICIPANTS_COUNT)
-
-    for bot_char in selected_bots:
-        bot_participant = models.TournamentParticipant(
-            tournament_id=tournament_id,
-            user_id=None,
-            ai_name=f"IA: {bot_char.nombre}",
-            character_id=bot_char.id
-        )
-        db.add(bot_participant)
-        participant_list.append(bot_participant)
-
-    random.shuffle(participant_list)
-
-    await db.flush()
-
-    for i in range(MAX_PARTICIPANTS // 2):
-        match = models.TournamentMatch(
-            tournament_id=tournament_id,
-            round=1,
-            match_index=i,
-            player1_id=participant_list[i * 2].id,
-            player2_id=participant_list[i * 2 + 1].id,
-            status="pending"
-        )
-        db.add(match)
+    try:
+        seeded_characters = tournament_service.sembrar_participantes(character, all_characters)
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Inicio del torneo en dos INSERT multi-fila con RETURNING (participantes y primera
+    # ronda); la respuesta y el bracket se montan con esas filas, sin releerlas.
+    participant_list = [
+        {
+            "tournament_id": tournament_id,
+            "user_id": current_user.id if seeded_char.id == character.id else None,
+            "ai_name": None if seeded_char.id == character.id else f"IA: {seeded_char.nombre}",
+            "character_id": seeded_char.id
+        }
+        for seeded_char in seeded_characters
+    ]
+    result = await db.execute(
+        insert(models.TournamentParticipant)
+        .returning(models.TournamentParticipant.id, sort_by_parameter_order=True)
+        .execution_options(render_nulls=True),  # humano e IA en el mismo lote aunque lleven NULL distintos
+        participant_list
+    )
+    for participant, participant_id in zip(participant_list, result.scalars()):
+        participant["id"] = participant_id
+
+    matches = [
+        {
+            "tournament_id": tournament_id,
+            "round": 1,
+            "match_index": i,
+            "player1_id": participant_list[i * 2]["id"],
+            "player2_id": participant_list[i * 2 + 1]["id"],
+            "winner_id": None,
+            "status": "pending"
+        }
+        for i in range(MAX_PARTICIPANTS // 2)
+    ]
+    result = await db.execute(
+        insert(models.TournamentMatch).returning(models.TournamentMatch.id, sort_by_parameter_order=True),
+        matches
+    )
+    for match, match_id in zip(matches, result.scalars()):
+        match["id"] = match_id
 
+    tournament.bracket = tournament_service.compactar_bracket(
+        [SimpleNamespace(**p) for p in participant_list],
+        [SimpleNamespace(**m) for m in matches]
+    )
     tournament.status = "active"
     tournament.start_time = datetime.now(timezone.utc)
+    detalle = _schema_desde_bracket(tournament, {current_user.id: current_user})
 
     await db.commit()
+    tournament_cache_service.guardar(detalle)
+    return detalle
+
+
+async def _finalizar_torneo(db: AsyncSession, tournament: models.Tournament,
+                            winner_participant: models.TournamentParticipant) -> dict | None:
+    """
+    Marca el torneo como terminado. Devuelve la entrada del leaderboard si ganó un
+    jugador humano, para pasarla a leaderboard_service.registrar_finalizado tras el commit.
+    """
+    if winner_participant.user_id:
+        tournament.winner_id = winner_participant.user_id
+    else:
+
+        tournament.winner_id = None
+
+    tournament.status = "completed"
+    tournament.end_time = datetime.now(timezone.utc)
+    tournament.duration_seconds = leaderboard_service.duracion_torneo(tournament)
+    db.add(tournament)
+
+    winner_name = winner_participant.user.username if winner_participant.user else winner_participant.ai_name
+    await create_audit_log(db, winner_name, "TOURNAMENT_WIN", f"Ganador de '{tournament.name}': {winner_name}")
+
+    if tournament.winner_id is None or tournament.duration_seconds is None:
+        return None
+    return {
+        "tournament_name": tournament.name,
+        "winner_name": winner_name,
+        "duration_seconds": tournament.duration_seconds,
+        "completed_at": tournament.end_time,
+    }
+
+
+def _resolver_rondas_pendientes(
+        tournament: models.Tournament,
+        character_map: dict,
+        stop_at_player: bool = False
+) -> (List[models.TournamentMatch], models.TournamentParticipant | None):
+    """
+    Simula en memoria todos los partidos pendientes del torneo, ronda a ronda.
+    Los partidos existentes se actualizan en el sitio; los de rondas posteriores
+    se devuelven sin añadir a la sesión para insertarlos de golpe.
+    Si stop_at_player es True, se detiene antes del siguiente partido del jugador humano.
+    """
+    participant_map = {p.id: p for p in tournament.participants}
+    human_ids = {p.id for p in tournament.participants if p.user_id is not None}
+
+    current_round = max(m.round for m in tournament.matches)
+    round_matches = sorted((m for m in tournament.matches if m.round == current_round), key=lambda x: x.match_index)
+    new_matches = []
+
+    while True:
+        for m in round_matches:
+            if m.status != "pending":
+                continue
+            if stop_at_player and (m.player1_id in human_ids or m.player2_id in human_ids):
+                continue
+
+            char1 = character_map[participant_map[m.player1_id].character_id]
+            char2 = character_map[participant_map[m.player2_id].character_id]
+            m.seed = battle_service.nueva_semilla()
+            m.battle_stats = battle_service.stats_de_batalla(char1, char2)
+            winner_char, _ = battle_service.simular_batalla(char1, char2, m.seed)
+            m.winner_id = m.player1_id if winner_char.id == char1.id else m.player2_id
+            m.status = "completed"
+
+        if any(m.status == "pending" for m in round_matches):
+            return new_matches, None
+
+        winner_ids = [m.winner_id for m in round_matches]
+        if current_round == TOTAL_ROUNDS:
+            return new_matches, participant_map[winner_ids[0]]
+
+        current_round += 1
+        round_matches = [
+            models.TournamentMatch(
+                tournament_id=tournament.id,
+                round=current_round,
+                match_index=i,
+                player1_id=winner_ids[i * 2],
+                player2_id=winner_ids[i * 2 + 1],
+                status="pending"
+            )
+            for i in range(len(winner_ids) // 2)
+        ]
+        new_matches.extend(round_matches)
 
-    return await get_tournament_details(tournament_id, db)
-
-
-def _simulate_battle(p1: schemas.Personaje, p2: schemas.Personaje) -> (schemas.Personaje, List[str]):
-    hp1 = p1.info.defensa
-    hp2 = p2.info.defensa
-    spec1_usado = False
-    spec2_usado = False
-    log = [f"¡Comienza la simulación entre {p1.nombre} y {p2.nombre}!"]
-
-    while hp1 > 0 and hp2 > 0:
-        accion_1 = "ataque_normal"
-        if not spec1_usado and random.random() < 0.3:
-            accion_1 = "ataque_especial"
-            spec1_usado = True
 
-        habilidad_1 = battle_service.factory_habilidades.get_habilidad(accion_1)
-        daño, msg = habilidad_1.ejecutar(p1, p2)
-        hp2 = max(0, hp2 - daño)
-        log.append(msg)
-        if hp2 <= 0:
-            log.append(f"¡{p1.nombre} ha ganado la batalla!")
-            return p1, log
+@router.post("/{tournament_id}/simulate-all", response_model=schemas.TournamentSchema)
+async def simulate_all_matches(
+        tournament_id: int,
+        stop_at_player: bool = False,
+        db: AsyncSession = Depends(get_db),
+        current_user: security.UserResponse = Depends(security.get_current_user)
+):
+    logger.info(f"Simulación completa del torneo {tournament_id} iniciada por {current_user.username}")
 
-        accion_2 = "ataque_normal"
-        if not spec2_usado and random.random() < 0.3:
-            accion_2 = "ataque_especial"
-            spec2_usado = True
+    tournament = await db.get(
+        models.Tournament,
+        tournament_id,
+        options=[
+            selectinload(models.Tournament.participants).joinedload(models.TournamentParticipant.user),
+            selectinload(models.Tournament.matches)
+        ],
+        with_for_update=True  # Como en simulate_match: serializa las reescrituras del bracket
+    )
+    if not tournament:
+        raise HTTPException(status_code=404, detail="Torneo no encontrado")
+    if tournament.status != "active":
+        raise HTTPException(status_code=400, detail="El torneo no está en curso.")
+
+    character_map = swapi_service.obtener_catalogo().por_id
+    new_matches, winner_participant = _resolver_rondas_pendientes(tournament, character_map, stop_at_player)
+
+    if new_matches:
+        result = await db.execute(
+            insert(models.TournamentMatch).returning(models.TournamentMatch.id, sort_by_parameter_order=True),
+            [
+                {
+                    "tournament_id": m.tournament_id,
+                    "round": m.round,
+                    "match_index": m.match_index,
+                    "player1_id": m.player1_id,
+                    "player2_id": m.player2_id,
+                    "winner_id": m.winner_id,
+                    "status": m.status,
+                    "seed": m.seed,
+                    "battle_stats": m.battle_stats,
+                }
+                for m in new_matches
+            ]
+        )
+        for m, match_id in zip(new_matches, result.scalars()):
+            m.id = match_id
+    tournament.bracket = tournament_service.compactar_bracket(tournament.participants, tournament.matches + new_matches)
 
-        habilidad_2 = battle_service.factory_habilidades.get_habilidad(accion_2)
-        daño_ia, msg_ia = habilidad_2.ejecutar(p2, p1)
-        hp1 = max(0, hp1 - daño_ia)
-        log.append(msg_ia)
-        if hp1 <= 0:
-            log.append(f"¡{p2.nombre} ha ganado la batalla!")
-            return p2, log
+    entrada_leaderboard = None
+    if winner_participant:
+        entrada_leaderboard = await _finalizar_torneo(db, tournament, winner_participant)
 
-    return p1 if hp1 > 0 else p2, log
+    await create_audit_log(db, current_user.username, "SIMULATE_ALL", f"Simulación completa de '{tournament.name}'")
+    await db.commit()
+    if entrada_leaderboard:
+        leaderboard_service.registrar_finalizado(entrada_leaderboard)
+
+    # Si el torneo ha terminado, queda cacheado ya serializado para todas las lecturas siguientes.
+    detalle = await _detalle_torneo(db, tournament_id)
+    tournament_cache_service.guardar(detalle)
+    return detalle
+
+
+def _bloqueo_torneo_del_partido(match_id: int):
+    """
+    SELECT ... FOR UPDATE de la fila del torneo del partido. Cada simulación reescribe el
+    bracket entero: hay que bloquear antes de leer los partidos para que dos partidos
+    simultáneos del mismo torneo no se pisen. SQLite no lo necesita (un solo escritor).
+    """
+    return (
+        select(models.Tournament.id)
+        .where(models.Tournament.id == select(models.TournamentMatch.tournament_id)
+               .where(models.TournamentMatch.id == match_id).scalar_subquery())
+        .with_for_update()
+    )
 
 
 @router.post("/match/{match_id}/simulate", response_model=schemas.TournamentMatchSchema)
 async def simulate_match(
         match_id: int,
         db: AsyncSession = Depends(get_db),
-        current_user: models.User = Depends(security.get_current_user)
+        current_user: security.UserResponse = Depends(security.get_current_user)
 ):
     logger.info(f"Simulación de partido {match_id} iniciada por {current_user.username}")
 
+    await db.execute(_bloqueo_torneo_del_partido(match_id))
     match = await db.get(
         models.TournamentMatch,
         match_id,
@@ -267,10 +445,13 @@ async def simulate_match(
     if not match.player1 or not match.player2:
         raise HTTPException(status_code=400, detail="El partido aún no tiene a los dos jugadores asignados.")
 
-    char1 = await swapi_service.get_character_by_id(match.player1.character_id)
-    char2 = await swapi_service.get_character_by_id(match.player2.character_id)
+    catalogo = swapi_service.obtener_catalogo()
+    char1 = catalogo.obtener(match.player1.character_id)
+    char2 = catalogo.obtener(match.player2.character_id)
 
-    winner_char, battle_log = _simulate_battle(char1, char2)
+    match.seed = battle_service.nueva_semilla()
+    match.battle_stats = battle_service.stats_de_batalla(char1, char2)
+    winner_char, _ = battle_service.simular_batalla(char1, char2, match.seed)
 
     winner_participant = match.player1 if winner_char.id == char1.id else match.player2
     match.winner_id = winner_participant.id
@@ -282,23 +463,14 @@ async def simulate_match(
 
     round_matches = [m for m in tournament.matches if m.round == current_round]
     all_round_matches_completed = all(m.status == "completed" or m.id == match.id for m in round_matches)
+    entrada_leaderboard = None
+    new_matches = []
 
     if all_round_matches_completed:
         winner_ids = [m.winner_id for m in sorted(round_matches, key=lambda x: x.match_index)]
 
-        if current_round == 4:
-            if winner_participant.user_id:
-                tournament.winner_id = winner_participant.user_id
-            else:
-
-                tournament.winner_id = None
-
-            tournament.status = "completed"
-            tournament.end_time = datetime.now(timezone.utc)
-            db.add(tournament)
-
-            winner_name = winner_participant.user.username if winner_participant.user else winner_participant.ai_name
-            await create_audit_log(db, winner_name, "TOURNAMENT_WIN", f"Ganador de '{tournament.name}': {winner_name}")
+        if current_round == TOTAL_ROUNDS:
+            entrada_leaderboard = await _finalizar_torneo(db, tournament, winner_participant)
 
         else:
             next_round = current_round + 1
@@ -312,28 +484,65 @@ async def simulate_match(
                     status="pending"
                 )
                 db.add(new_match)
+                new_matches.append(new_match)
+            await db.flush()
 
-    await db.commit()
-
-    await db.refresh(match)
+    tournament.bracket = tournament_service.compactar_bracket(tournament.participants, tournament.matches + new_matches)
 
+    # La respuesta se construye antes del commit, con lo ya cargado: el commit
+    # expira los objetos y releerlos costaría varias consultas más.
     p1_schema = schemas.TournamentParticipantSchema.from_orm(match.player1)
-    p1_schema.character = await swapi_service.get_character_by_id(match.player1.character_id)
+    p1_schema.character = catalogo.obtener(match.player1.character_id)
 
     p2_schema = schemas.TournamentParticipantSchema.from_orm(match.player2)
-    p2_schema.character = await swapi_service.get_character_by_id(match.player2.character_id)
-
-    winner_schema = None
-    if match.winner_id:
-        winner_p_model = await db.get(models.TournamentParticipant, match.winner_id,
-                                      options=[joinedload(models.TournamentParticipant.user)])
-        if winner_p_model:
-            winner_schema = schemas.TournamentParticipantSchema.from_orm(winner_p_model)
-            winner_schema.character = await swapi_service.get_character_by_id(winner_p_model.character_id)
+    p2_schema.character = catalogo.obtener(match.player2.character_id)
 
     final_match_schema = schemas.TournamentMatchSchema.from_orm(match)
     final_match_schema.player1 = p1_schema
     final_match_schema.player2 = p2_schema
-    final_match_schema.winner = winner_schema
+    final_match_schema.winner = p1_schema if match.winner_id == match.player1_id else p2_schema
+    # Los participantes llegan con su usuario cargado (lazy="joined"): el detalle final sale de memoria.
+    tournament_id = tournament.id
+    detalle_final = None
+    if tournament.status == "completed":
+        usuarios = {p.user_id: security.UserResponse.from_orm(p.user) for p in tournament.participants if p.user}
+        detalle_final = _schema_desde_bracket(tournament, usuarios)
 
-    return final_match_schema
\ No newline at end of file
+    await db.commit()
+    if entrada_leaderboard:
+        leaderboard_service.registrar_finalizado(entrada_leaderboard)
+    if detalle_final:
+        tournament_cache_service.guardar(detalle_final)
+    else:
+        tournament_cache_service.invalidar(tournament_id)
+
+    return final_match_schema
+
+@router.get("/match/{match_id}/replay", response_model=schemas.MatchReplaySchema)
+async def replay_match(match_id: int, db: AsyncSession = Depends(get_db)):
+    match = await db.get(models.TournamentMatch, match_id)
+    if not match:
+        raise HTTPException(status_code=404, detail="Partido no encontrado")
+    if match.status != "completed" or match.seed is None:
+        raise HTTPException(status_code=400, detail="Este partido no tiene repetición disponible.")
+
+    catalogo = swapi_service.obtener_catalogo()
+    char1 = catalogo.obtener(match.player1.character_id)
+    char2 = catalogo.obtener(match.player2.character_id)
+    if match.battle_stats:
+        # Se repite con las stats del momento de la simulación, no con las del catálogo vigente.
+        char1 = battle_service.con_stats(char1, match.battle_stats[0])
+        char2 = battle_service.con_stats(char2, match.battle_stats[1])
+    winner_char, battle_log = battle_service.simular_batalla(char1, char2, match.seed, con_log=True)
+
+    # Partidos anteriores a battle_stats, o reglas de daño cambiadas desde entonces.
+    if match.winner and winner_char.id != match.winner.character_id:
+        logger.warning(f"La repetición del partido {match_id} no coincide con el resultado guardado.")
+        raise HTTPException(status_code=409, detail="La repetición ya no es reproducible con las reglas actuales.")
+
+    return schemas.MatchReplaySchema(
+        match_id=match.id,
+        seed=match.seed,
+        winner_character_id=winner_char.id,
+        log=battle_log
+    )
@@ -49,6 +49,13 @@ class TournamentMatchSchema(BaseModel):
         from_attributes = True
 
 
+class MatchReplaySchema(BaseModel):
+    match_id: int
+    seed: int
+    winner_character_id: str
+    log: List[str]
+
+
 class TournamentSchema(BaseModel):
     id: int
     name: str
@@ -78,4 +85,11 @@ class LeaderboardEntrySchema(BaseModel):
     completed_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class MatrizMatchupsSchema(BaseModel):
+    version: str
+    personajes: List[str]
+    # probabilidades[i][j]: probabilidad de que personajes[i] gane a personajes[j] atacando primero
+    probabilidades: List[List[float]]
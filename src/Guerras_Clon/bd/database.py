@@ -1,21 +1,92 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import itertools
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from src.Guerras_Clon.core.config import settings
 
 DATABASE_URL = settings.DATABASE_URL
 
 
-engine = create_async_engine(DATABASE_URL, echo = True)
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine,
-    class_=AsyncSession
+def crear_engine(url: str, pool_size: int, max_overflow: int) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=True
+    )
 
+
+class EnrutadorSesiones:
+    """
+    Reparte las sesiones entre la base de datos principal (escrituras y lecturas que
+    deben ver lo recién escrito) y las réplicas de solo lectura, por turnos. Sin
+    réplicas, las lecturas van también a la principal.
+
+    Las réplicas pueden ir algo por detrás de la principal: solo deben leer de ellas
+    los endpoints que toleran datos de hace unos instantes.
+    """
+
+    def __init__(self, engine_escritura: AsyncEngine, engines_lectura: list[AsyncEngine] = ()):
+        self.engine_escritura = engine_escritura
+        self.engines_lectura = list(engines_lectura)
+        self.escritura = self._sessionmaker(engine_escritura)
+        self._lecturas = [self._sessionmaker(e) for e in self.engines_lectura] or [self.escritura]
+        self._turno = itertools.cycle(self._lecturas)
+
+    @staticmethod
+    def _sessionmaker(engine: AsyncEngine) -> sessionmaker:
+        return sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            bind=engine,
+            class_=AsyncSession
+        )
+
+    def sesion_lectura(self) -> AsyncSession:
+        return next(self._turno)()
+
+    async def cerrar(self):
+        for engine in [self.engine_escritura, *self.engines_lectura]:
+            await engine.dispose()
+
+
+engine = crear_engine(DATABASE_URL, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+enrutador = EnrutadorSesiones(
+    engine,
+    [crear_engine(url, settings.DB_READ_POOL_SIZE, settings.DB_READ_MAX_OVERFLOW) for url in settings.DB_READ_URLS]
 )
+SessionLocal = enrutador.escritura
 
 Base = declarative_base()
 
+
+def crear_columnas_pendientes(conn):
+    """
+    create_all tampoco añade columnas a tablas existentes. Sin herramienta de migraciones,
+    se añaden aquí las columnas nuevas que admiten NULL (las que no, requieren migrar a mano).
+    """
+    inspector = inspect(conn)
+    tablas = set(inspector.get_table_names())
+    for tabla in Base.metadata.sorted_tables:
+        if tabla.name not in tablas:
+            continue
+        existentes = {c["name"] for c in inspector.get_columns(tabla.name)}
+        for columna in tabla.columns:
+            if columna.name not in existentes and columna.nullable:
+                tipo = columna.type.compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {tabla.name} ADD COLUMN {columna.name} {tipo}"))
+
+
+def crear_indices_pendientes(conn):
+    """create_all no añade índices nuevos a tablas que ya existen; esto los crea si faltan."""
+    tablas = set(inspect(conn).get_table_names())
+    for tabla in Base.metadata.sorted_tables:
+        if tabla.name not in tablas:
+            continue
+        for indice in tabla.indexes:
+            indice.create(conn, checkfirst=True)
+
 async def get_db():
     async with SessionLocal() as session:
         try:
@@ -26,3 +97,12 @@ async def get_db():
         finally:
             await session.close()
 
+
+async def get_read_db():
+    """Sesión de solo lectura; puede ir a una réplica (ver EnrutadorSesiones)."""
+    async with enrutador.sesion_lectura() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
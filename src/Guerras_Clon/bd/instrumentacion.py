@@ -0,0 +1,88 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONSULTAS_POR_PETICION = Histogram("guerras_clon_bd_consultas_por_peticion", "Sentencias SQL ejecutadas por petición",
+                                   ["ruta"], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89))
+FILAS_POR_PETICION = Histogram("guerras_clon_bd_filas_por_peticion", "Filas devueltas o modificadas por petición",
+                               ["ruta"], buckets=(0, 1, 10, 50, 100, 250, 500, 1000, 5000, 10000))
+TIEMPO_BD_POR_PETICION = Histogram("guerras_clon_bd_segundos_por_peticion", "Tiempo en la base de datos por petición",
+                                   ["ruta"])
+
+
+class MedicionConsultas:
+    """Sentencias, filas y segundos de base de datos acumulados en un bloque medir_consultas()."""
+    __slots__ = ("sentencias", "filas", "segundos")
+
+    def __init__(self):
+        self.sentencias = 0
+        self.filas = 0
+        self.segundos = 0.0
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.segundos * 1000:.1f};desc="{self.sentencias} consultas, {self.filas} filas"'
+
+
+_medicion_actual: ContextVar[MedicionConsultas | None] = ContextVar("medicion_consultas", default=None)
+
+
+@contextmanager
+def medir_consultas() -> Iterator[MedicionConsultas]:
+    """
+    Mide lo que ejecuten las sesiones dentro del bloque (y en las tareas que este lance).
+    Las sesiones async ejecutan en greenlets que heredan el contexto, así que
+    los eventos del engine síncrono ven la medición de la petición.
+    """
+    medicion = MedicionConsultas()
+    token = _medicion_actual.set(medicion)
+    try:
+        yield medicion
+    finally:
+        _medicion_actual.reset(token)
+
+
+def registrar_peticion(ruta: str, medicion: MedicionConsultas):
+    CONSULTAS_POR_PETICION.labels(ruta=ruta).observe(medicion.sentencias)
+    FILAS_POR_PETICION.labels(ruta=ruta).observe(medicion.filas)
+    TIEMPO_BD_POR_PETICION.labels(ruta=ruta).observe(medicion.segundos)
+
+
+def _filas(cursor) -> int:
+    """
+    Filas devueltas o modificadas según el rowcount del DBAPI. asyncpg lo da en todas las
+    sentencias (lo saca del estado "SELECT n", "UPDATE n", "INSERT 0 n"); sqlite3 deja -1
+    en los SELECT, y para esos se cuentan las filas que el cursor adaptado de aiosqlite ya
+    trajo a su buffer `_rows` (tests/bd/test_database.py fija ese comportamiento).
+    """
+    if cursor.rowcount >= 0:
+        return cursor.rowcount
+    filas = getattr(cursor, "_rows", None)
+    return len(filas) if filas is not None else 0
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    if _medicion_actual.get() is not None:
+        conn.info.setdefault("inicio_consulta", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    medicion = _medicion_actual.get()
+    inicios = conn.info.get("inicio_consulta")
+    if medicion is None or not inicios:
+        return
+    medicion.segundos += time.perf_counter() - inicios.pop()
+    medicion.sentencias += 1
+    medicion.filas += _filas(cursor)
+
+
+@event.listens_for(Engine, "handle_error")
+def _error_al_ejecutar(contexto_error):
+    inicios = contexto_error.connection.info.get("inicio_consulta") if contexto_error.connection else None
+    if inicios:
+        inicios.pop()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, BigInteger, Float, String, DateTime, ForeignKey, Boolean, Index, JSON
 from sqlalchemy.sql import func
 from src.Guerras_Clon.bd.database import Base
 from sqlalchemy.orm import relationship
@@ -19,14 +19,40 @@ class User(Base):
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    # Índices de la paginación por cursor (timestamp, id), sola o filtrada por usuario o acción.
+    __table_args__ = (
+        Index("ix_audit_logs_timestamp_id", "timestamp", "id"),
+        Index("ix_audit_logs_username_timestamp_id", "username", "timestamp", "id"),
+        Index("ix_audit_logs_action_timestamp_id", "action", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
-    username = Column(String, index=True)
-    action = Column(String, index=True)
+    username = Column(String)
+    action = Column(String)
     details = Column(String, nullable=True)
 
 
+class StatsCounter(Base):
+    """
+    Contadores globales que se actualizan con cada evento, para no hacer COUNT(*).
+    Los muy concurridos se reparten en fragmentos "nombre#n" (ver stats_service).
+    """
+    __tablename__ = "stats_counters"
+
+    name = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+
+class AuditActivityHourly(Base):
+    """Eventos de auditoría agregados por hora y acción."""
+    __tablename__ = "audit_activity_hourly"
+
+    hour = Column(DateTime(timezone=True), primary_key=True)
+    action = Column(String, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+
 class VerificationCode(Base):
     __tablename__ = "verification_codes"
     id = Column(Integer, primary_key=True, index=True)
@@ -34,11 +60,17 @@ class VerificationCode(Base):
     username = Column(String)
     hashed_password = Column(String)
     code = Column(String, index=True)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)  # Limpieza periódica de caducados
 
 
 class Tournament(Base):
     __tablename__ = "tournaments"
+    # Leaderboard: los más rápidos de todos los tiempos y los terminados en una ventana reciente.
+    # El prefijo (status) sirve también para listar los torneos pendientes en /open.
+    __table_args__ = (
+        Index("ix_tournaments_status_duration", "status", "duration_seconds"),
+        Index("ix_tournaments_status_end_time", "status", "end_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -46,6 +78,10 @@ class Tournament(Base):
     winner_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # El User ID del ganador
     start_time = Column(DateTime(timezone=True), nullable=True)
     end_time = Column(DateTime(timezone=True), nullable=True)
+    duration_seconds = Column(Float, nullable=True)  # end_time - start_time, guardado al terminar
+    # Cuadro compacto (tournament_service.compactar_bracket): el detalle se lee de esta fila
+    # sin cruzar participantes y partidos. Se reescribe con cada cambio del cuadro.
+    bracket = Column(JSON, nullable=True)
     winner = relationship("User")
     participants = relationship("TournamentParticipant", back_populates="tournament", lazy="joined")
     matches = relationship("TournamentMatch", back_populates="tournament", lazy="joined")
@@ -55,7 +91,7 @@ class TournamentParticipant(Base):
     __tablename__ = "tournament_participants"
 
     id = Column(Integer, primary_key=True, index=True)
-    tournament_id = Column(Integer, ForeignKey("tournaments.id"))
+    tournament_id = Column(Integer, ForeignKey("tournaments.id"), index=True)
     character_id = Column(String)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     ai_name = Column(String, nullable=True)
@@ -66,6 +102,10 @@ class TournamentParticipant(Base):
 
 class TournamentMatch(Base):
     __tablename__ = "tournament_matches"
+    # Partidos de un torneo (detalle, simulación) y de una ronda concreta, en orden.
+    __table_args__ = (
+        Index("ix_tournament_matches_tournament_round", "tournament_id", "round", "match_index"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     tournament_id = Column(Integer, ForeignKey("tournaments.id"))
@@ -77,6 +117,8 @@ class TournamentMatch(Base):
     winner_id = Column(Integer, ForeignKey("tournament_participants.id"), nullable=True)
 
     status = Column(String, default="pending")
+    seed = Column(BigInteger, nullable=True)  # Semilla de la batalla: permite regenerar el log
+    battle_stats = Column(JSON, nullable=True)  # [daño, defensa, ataque_especial] de cada jugador al simular
 
     tournament = relationship("Tournament", back_populates="matches")
 
@@ -0,0 +1,106 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class CacheTTL:
+    """
+    Caché en memoria acotada en número de entradas, con expulsión LRU y caducidad.
+
+    Con renovar_al_leer=True la caducidad cuenta desde el último acceso
+    (inactividad); si no, desde que se guardó la entrada. Las entradas
+    caducadas se purgan al leer y al escribir, sin tareas en segundo plano.
+    al_expulsar(clave, valor, motivo) recibe "capacidad" o "caducidad".
+
+    Con max_bytes, la capacidad también se limita por el tamaño de los valores
+    según `tamaño` (len por defecto, pensado para valores bytes/str); un valor
+    que por sí solo supera max_bytes no se guarda.
+    """
+
+    def __init__(self, max_entradas: int, ttl_segundos: float | None = None, renovar_al_leer: bool = False,
+                 al_expulsar: Callable[[Hashable, Any, str], None] | None = None,
+                 reloj: Callable[[], float] = time.monotonic,
+                 max_bytes: int | None = None, tamaño: Callable[[Any], int] = len):
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self.renovar_al_leer = renovar_al_leer
+        self.max_bytes = max_bytes
+        self._tamaño = tamaño
+        self._al_expulsar = al_expulsar
+        self._reloj = reloj
+        self._datos: OrderedDict[Hashable, tuple[Any, float | None]] = OrderedDict()
+        self.bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+    def __contains__(self, clave: Hashable) -> bool:
+        return self.get(clave, contar=False) is not None
+
+    def _expira_en(self, ttl: float | None) -> float | None:
+        ttl = self.ttl_segundos if ttl is None else ttl
+        return None if ttl is None else self._reloj() + ttl
+
+    def get(self, clave: Hashable, default: Any = None, contar: bool = True) -> Any:
+        entrada = self._datos.get(clave)
+        if entrada is not None:
+            valor, expira_en = entrada
+            if expira_en is not None and expira_en <= self._reloj():
+                self._expulsar(clave, "caducidad")
+            else:
+                self._datos.move_to_end(clave)
+                if self.renovar_al_leer:
+                    self._datos[clave] = (valor, self._expira_en(None))
+                if contar:
+                    self.aciertos += 1
+                return valor
+        if contar:
+            self.fallos += 1
+        return default
+
+    def set(self, clave: Hashable, valor: Any, ttl: float | None = None):
+        self.pop(clave)
+        if self.max_bytes is not None:
+            tamaño = self._tamaño(valor)
+            if tamaño > self.max_bytes:
+                return
+            self.bytes += tamaño
+        self._datos[clave] = (valor, self._expira_en(ttl))
+        self.purgar_caducadas()
+        while len(self._datos) > self.max_entradas or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            self._expulsar(next(iter(self._datos)), "capacidad")
+
+    def pop(self, clave: Hashable, default: Any = None) -> Any:
+        entrada = self._datos.pop(clave, None)
+        if entrada is None:
+            return default
+        self._descontar(entrada[0])
+        return entrada[0]
+
+    def clear(self):
+        self._datos.clear()
+        self.bytes = 0
+
+    def _descontar(self, valor: Any):
+        if self.max_bytes is not None:
+            self.bytes -= self._tamaño(valor)
+
+    def purgar_caducadas(self) -> int:
+        """Purga desde la entrada menos usada mientras estén caducadas."""
+        ahora = self._reloj()
+        purgadas = 0
+        while self._datos:
+            clave, (_, expira_en) = next(iter(self._datos.items()))
+            if expira_en is None or expira_en > ahora:
+                break
+            self._expulsar(clave, "caducidad")
+            purgadas += 1
+        return purgadas
+
+    def _expulsar(self, clave: Hashable, motivo: str):
+        valor, _ = self._datos.pop(clave)
+        self._descontar(valor)
+        if self._al_expulsar:
+            self._al_expulsar(clave, valor, motivo)
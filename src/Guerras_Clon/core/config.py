@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import computed_field
+from typing import Literal
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -13,6 +14,12 @@ class Settings(BaseSettings):
     DB_NAME: str
     DB_HOST: str
     DB_PORT: int
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_READ_URLS: list[str] = []
+    DB_READ_POOL_SIZE: int = 10
+    DB_READ_MAX_OVERFLOW: int = 20
     MAIL_USERNAME: str | None = None
     MAIL_PASSWORD: str | None = None
     MAIL_FROM: str | None = None
@@ -22,6 +29,27 @@ class Settings(BaseSettings):
     MAIL_SSL_TLS: bool = False
     USE_CREDENTIALS: bool = True
     VALIDATE_CERTS: bool = True
+    BATTLE_SESSION_MAX: int = 10000
+    BATTLE_SESSION_TTL_SECONDS: int = 1800
+    BATTLE_SESSION_BACKEND: Literal["memory", "redis"] = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    CATALOG_PATH: str | None = None
+    CATALOG_RELOAD_INTERVAL_SECONDS: float = 5.0
+    AUTH_CACHE_MAX: int = 10000
+    AUTH_CACHE_TTL_SECONDS: int = 30
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_MAX: int = 64
+    AUDIT_MODE: Literal["sync", "async"] = "async"
+    AUDIT_BATCH_SIZE: int = 200
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_QUEUE_MAX: int = 10000
+    AUDIT_OVERFLOW_POLICY: Literal["sync", "block", "drop"] = "sync"
+    AUDIT_RETENTION_DAYS: int = 90
+    LEADERBOARD_CACHE_TTL_SECONDS: int = 60
+    TOURNAMENT_CACHE_MAX_ENTRIES: int = 50000
+    TOURNAMENT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    TOURNAMENT_CACHE_COMPLETED_TTL_SECONDS: int = 3600
+    TOURNAMENT_CACHE_ACTIVE_TTL_SECONDS: float = 2.0
 
     @computed_field
     @property
@@ -0,0 +1,19 @@
+from fastapi import Request, Response
+
+
+def etag_coincide(if_none_match: str | None, etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110): admite listas, "*" y el prefijo W/."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etiqueta = etag.removeprefix("W/")
+    return any(candidato.strip().removeprefix("W/") == etiqueta for candidato in if_none_match.split(","))
+
+
+def respuesta_json_cacheada(request: Request, cuerpo: bytes, etag: str, cache_control: str) -> Response:
+    """Devuelve el JSON ya serializado, o un 304 vacío si el cliente tiene esa versión."""
+    cabeceras = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_coincide(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cabeceras)
+    return Response(content=cuerpo, media_type="application/json", headers=cabeceras)
@@ -1,44 +1,174 @@
+import asyncio
 import inspect
+import logging
+from datetime import datetime, timezone
 from functools import wraps
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import delete, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from ..bd import models
+from ..bd.database import SessionLocal
+from ..core.config import settings
+from ..services import stats_service
+
+logger = logging.getLogger(__name__)
+
+AUDITORIA_EN_COLA = Gauge("guerras_clon_auditoria_en_cola", "Registros de auditoría pendientes de escribir")
+AUDITORIA_LOTES = Histogram("guerras_clon_auditoria_lote", "Registros de auditoría por inserción",
+                            buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000))
+AUDITORIA_DESCARTADOS = Counter("guerras_clon_auditoria_descartados", "Registros de auditoría perdidos", ["motivo"])
+
+
+class EscritorAuditoria:
+    """
+    Cola en memoria y tarea en segundo plano que inserta los registros de auditoría
+    por lotes: escribe al juntar `tamaño_lote` registros o cuando pasan
+    `intervalo_segundos` desde el primero del lote, lo que ocurra antes.
+
+    Con la cola llena, `politica_desborde` decide: "sync" escribe el registro en la
+    transacción de la petición (no se pierde nada), "block" espera a que haya sitio
+    y "drop" lo descarta y lo cuenta en AUDITORIA_DESCARTADOS.
+    """
+
+    def __init__(self, session_factory=SessionLocal,
+                 tamaño_lote: int = settings.AUDIT_BATCH_SIZE,
+                 intervalo_segundos: float = settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+                 max_cola: int = settings.AUDIT_QUEUE_MAX,
+                 politica_desborde: str = settings.AUDIT_OVERFLOW_POLICY):
+        self._session_factory = session_factory
+        self.tamaño_lote = tamaño_lote
+        self.intervalo_segundos = intervalo_segundos
+        self.politica_desborde = politica_desborde
+        self._cola: asyncio.Queue = asyncio.Queue(maxsize=max_cola)
+        self._tarea: asyncio.Task | None = None
+
+    @property
+    def activo(self) -> bool:
+        return self._tarea is not None and not self._tarea.done()
+
+    def iniciar(self):
+        if not self.activo:
+            self._tarea = asyncio.create_task(self._bucle())
+
+    async def detener(self):
+        """Escribe lo que quede en la cola y para la tarea."""
+        if self.activo:
+            await self._cola.put(None)
+            await self._tarea
+        self._tarea = None
+
+    async def encolar(self, db: AsyncSession, entrada: dict):
+        try:
+            self._cola.put_nowait(entrada)
+        except asyncio.QueueFull:
+            if self.politica_desborde == "block":
+                await self._cola.put(entrada)
+            elif self.politica_desborde == "drop":
+                AUDITORIA_DESCARTADOS.labels(motivo="cola_llena").inc()
+            else:
+                db.add(models.AuditLog(**entrada))
+                await stats_service.registrar_eventos(db, [entrada])
+        AUDITORIA_EN_COLA.set(self._cola.qsize())
+
+    async def _bucle(self):
+        loop = asyncio.get_running_loop()
+        parar = False
+        while not parar:
+            entrada = await self._cola.get()
+            if entrada is None:
+                break
+
+            lote = [entrada]
+            limite = loop.time() + self.intervalo_segundos
+            while len(lote) < self.tamaño_lote:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    entrada = await asyncio.wait_for(self._cola.get(), restante)
+                except asyncio.TimeoutError:
+                    break
+                if entrada is None:
+                    parar = True
+                    break
+                lote.append(entrada)
+
+            AUDITORIA_EN_COLA.set(self._cola.qsize())
+            await self._escribir(lote)
+
+    async def _escribir(self, lote: list[dict]):
+        try:
+            async with self._session_factory() as db:
+                await db.execute(insert(models.AuditLog), lote)
+                await stats_service.registrar_eventos(db, lote)
+                await db.commit()
+            AUDITORIA_LOTES.observe(len(lote))
+        except Exception as e:
+            AUDITORIA_DESCARTADOS.labels(motivo="error_bd").inc(len(lote))
+            logger.error(f"No se pudieron escribir {len(lote)} registros de auditoría: {e}")
+
+
+escritor_auditoria = EscritorAuditoria()
 
 
 async def create_audit_log(db: AsyncSession, username: str, action: str, details: str = ""):
-
-    log_entry = models.AuditLog(
-        username=username,
-        action=action,
-        details=details
-    )
-    db.add(log_entry)
-    await db.flush()
+    """
+    Con AUDIT_MODE="async" y el escritor en marcha, el registro se encola y se escribe
+    fuera de la transacción de la petición (se conserva aunque esta haga rollback).
+    Si no, se añade a la sesión y se inserta con el commit de la petición.
+    """
+    entrada = {
+        "timestamp": datetime.now(timezone.utc),
+        "username": username,
+        "action": action,
+        "details": details
+    }
+    if settings.AUDIT_MODE == "async" and escritor_auditoria.activo:
+        await escritor_auditoria.encolar(db, entrada)
+    else:
+        db.add(models.AuditLog(**entrada))
+        await stats_service.registrar_eventos(db, [entrada])
+
+
+async def purgar_auditoria_antigua(db: AsyncSession, antes_de: datetime, lote: int = 5000) -> int:
+    """
+    Borra los registros anteriores a `antes_de` en lotes de `lote` filas, con un commit
+    por lote para no mantener bloqueos largos sobre la tabla. Devuelve cuántos borró.
+    El total de /stats se descuenta; la agregación por hora se conserva como histórico.
+    """
+    total = 0
+    while True:
+        ids = select(models.AuditLog.id).where(models.AuditLog.timestamp < antes_de).limit(lote)
+        result = await db.execute(delete(models.AuditLog).where(models.AuditLog.id.in_(ids)))
+        await stats_service.incrementar(db, stats_service.CONTADOR_AUDITORIA, -result.rowcount)
+        await db.commit()
+        total += result.rowcount
+        if result.rowcount < lote:
+            return total
 
 
 def audit(action: str):
 
     def decorator(func):
+        arg_names = inspect.getfullargspec(func).args
+        db_index = arg_names.index("db") if "db" in arg_names else None
+        user_index = arg_names.index("current_user") if "current_user" in arg_names else None
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
 
             db: AsyncSession = None
-            current_user: models.User = None
+            current_user = None
             username = "anonymous"
 
             try:
                 db = kwargs.get("db")
                 current_user = kwargs.get("current_user")
 
-                if not db or not current_user:
-                    arg_names = inspect.getfullargspec(func).args
-                    if not db and "db" in arg_names:
-                        db_index = arg_names.index("db")
-                        if len(args) > db_index:
-                            db = args[db_index]
-                    if not current_user and "current_user" in arg_names:
-                        user_index = arg_names.index("current_user")
-                        if len(args) > user_index:
-                            current_user = args[user_index]
+                if not db and db_index is not None and len(args) > db_index:
+                    db = args[db_index]
+                if not current_user and user_index is not None and len(args) > user_index:
+                    current_user = args[user_index]
 
                 if current_user:
                     username = current_user.username
@@ -62,4 +192,4 @@ def audit(action: str):
 
         return wrapper
 
-    return decorator
\ No newline at end of file
+    return decorator
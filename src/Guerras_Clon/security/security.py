@@ -1,15 +1,21 @@
+import asyncio
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from prometheus_client import Counter, Histogram
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from ..bd import models
 from ..bd.database import get_db
+from ..core.cache import CacheTTL
+from ..core.config import settings
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
@@ -45,6 +51,7 @@ class UserResponse(BaseModel):
 
     class Config:
         from_attributes = True
+        frozen = True
 
 
 def verify_password(plain_password, hashed_password):
@@ -55,6 +62,52 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+HASH_ESPERA = Histogram("guerras_clon_hash_espera_segundos", "Tiempo en cola antes de calcular un hash bcrypt")
+HASH_DURACION = Histogram("guerras_clon_hash_duracion_segundos", "Tiempo de cálculo de un hash bcrypt", ["operacion"])
+HASH_RECHAZADOS = Counter("guerras_clon_hash_rechazados", "Peticiones rechazadas con 503 por la cola de bcrypt llena")
+
+# bcrypt libera el GIL, así que un pool de hilos dedicado basta para sacarlo del event loop.
+_executor_hash = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hashes_en_curso = 0
+
+
+async def _ejecutar_hash(operacion: str, funcion, *args):
+    """
+    Ejecuta `funcion` en el pool de bcrypt. Admite como mucho PASSWORD_HASH_WORKERS en
+    ejecución más PASSWORD_HASH_QUEUE_MAX en espera; por encima responde 503 al momento
+    en lugar de acumular peticiones que acabarían agotando su tiempo.
+    """
+    global _hashes_en_curso
+    if _hashes_en_curso >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_MAX:
+        HASH_RECHAZADOS.inc()
+        raise HTTPException(status_code=503, detail="Servidor ocupado, inténtalo de nuevo en unos segundos.",
+                            headers={"Retry-After": "1"})
+
+    encolado = time.perf_counter()
+
+    def _medir():
+        inicio = time.perf_counter()
+        HASH_ESPERA.observe(inicio - encolado)
+        try:
+            return funcion(*args)
+        finally:
+            HASH_DURACION.labels(operacion=operacion).observe(time.perf_counter() - inicio)
+
+    _hashes_en_curso += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor_hash, _medir)
+    finally:
+        _hashes_en_curso -= 1
+
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    return await _ejecutar_hash("verificar", verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password) -> str:
+    return await _ejecutar_hash("generar", get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
@@ -78,37 +131,81 @@ async def get_user_by_email(db: AsyncSession, email: str):
     return result.scalars().first()
 
 
-async def get_current_user(
-        token: str = Depends(oauth2_scheme),
-        db: AsyncSession = Depends(get_db)
-) -> models.User:
-    credentials_exception = HTTPException(
+CACHE_PRINCIPALES = Counter("guerras_clon_cache_principales", "Consultas a la caché de usuarios autenticados",
+                            ["cache", "resultado"])
+
+# Tokens ya decodificados (caducan con el propio token) y usuarios por nombre. La caché es
+# local a cada worker: las invalidaciones explícitas solo llegan al proceso que hace el
+# cambio, y en el resto el dato se refresca como mucho a los AUTH_CACHE_TTL_SECONDS.
+_tokens = CacheTTL(settings.AUTH_CACHE_MAX, settings.AUTH_CACHE_TTL_SECONDS)
+_usuarios = CacheTTL(settings.AUTH_CACHE_MAX, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=401,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def invalidar_usuario(username: str):
+    """Descarta el usuario cacheado; llamar tras cambiar su nombre, contraseña o rol."""
+    _usuarios.pop(username)
+
+
+def _decodificar_token(token: str) -> TokenData:
+    token_data = _tokens.get(token, contar=False)
+    if token_data is not None:
+        CACHE_PRINCIPALES.labels(cache="tokens", resultado="acierto").inc()
+        return token_data
+    CACHE_PRINCIPALES.labels(cache="tokens", resultado="fallo").inc()
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        role: str = payload.get("role")
+    except JWTError:
+        raise _credentials_exception()
 
-        if username is None or role is None:
-            raise credentials_exception
+    username: str = payload.get("sub")
+    role: str = payload.get("role")
+    if username is None or role is None:
+        raise _credentials_exception()
+
+    token_data = TokenData(username=username, role=role)
+    ttl = settings.AUTH_CACHE_TTL_SECONDS
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    _tokens.set(token, token_data, ttl=ttl)
+    return token_data
 
-        token_data = TokenData(username=username, role=role)
-    except JWTError:
-        raise credentials_exception
 
-    user = await get_user(db, username=token_data.username)
-    if user is None:
-        raise credentials_exception
+async def get_token_data(token: str = Depends(oauth2_scheme)) -> TokenData:
+    """Usuario y rol tal y como vienen en el token, sin consultar la base de datos."""
+    return _decodificar_token(token)
 
+
+async def get_current_user(
+        token_data: TokenData = Depends(get_token_data),
+        db: AsyncSession = Depends(get_db)
+) -> UserResponse:
+    user = _usuarios.get(token_data.username, contar=False)
+    if user is not None:
+        CACHE_PRINCIPALES.labels(cache="usuarios", resultado="acierto").inc()
+        return user
+    CACHE_PRINCIPALES.labels(cache="usuarios", resultado="fallo").inc()
+
+    db_user = await get_user(db, username=token_data.username)
+    if db_user is None:
+        raise _credentials_exception()
+
+    user = UserResponse.model_validate(db_user)
+    _usuarios.set(token_data.username, user)
     return user
 
 
 async def get_current_admin_user(
-        current_user: models.User = Depends(get_current_user)
-) -> models.User:
+        current_user: UserResponse = Depends(get_current_user)
+) -> UserResponse:
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not enough permissions")
     return current_user
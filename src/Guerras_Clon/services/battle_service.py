@@ -1,31 +1,89 @@
+import math
 import random
 from abc import ABC, abstractmethod
-from src.Guerras_Clon.api.schemas.star_wars_models import Personaje
+from functools import lru_cache
+from typing import List, NamedTuple
+from src.Guerras_Clon.api.schemas.star_wars_models import InfoPersonaje, Personaje
+
+# Incrementar al cambiar las fórmulas de daño: invalida los resultados precalculados.
+VERSION_REGLAS = 1
+PROBABILIDAD_ESQUIVAR = 0.25
+FACTOR_DAÑO_MIN = 0.85
+FACTOR_DAÑO_MAX = 1.15
+DIVISOR_DEFENSA = 25
+PROBABILIDAD_ESPECIAL_SIMULACION = 0.3
+
+
+class RangoDaño(NamedTuple):
+    """Daño base de un ataque y los extremos que puede causar si no se esquiva."""
+    base: int
+    minimo: int
+    maximo: int
+
+
+class TablaDaño(NamedTuple):
+    ataque_normal: RangoDaño
+    ataque_especial: RangoDaño
+
+
+def _rango_daño(base: int) -> RangoDaño:
+    # U nunca alcanza FACTOR_DAÑO_MAX, así que el máximo es el entero anterior a base * FACTOR_DAÑO_MAX.
+    minimo = max(1, int(base * FACTOR_DAÑO_MIN))
+    maximo = max(1, math.ceil(base * FACTOR_DAÑO_MAX) - 1)
+    return RangoDaño(base, minimo, maximo)
+
+
+@lru_cache(maxsize=4096)
+def tabla_daño_por_stats(daño: int, ataque_especial: int, defensa_rival: int) -> TablaDaño:
+    reduccion = defensa_rival // DIVISOR_DEFENSA
+    return TablaDaño(_rango_daño(daño - reduccion), _rango_daño(ataque_especial - reduccion))
+
+
+def tabla_daño(atacante: Personaje, defensor: Personaje) -> TablaDaño:
+    """Tabla precalculada de atacante contra defensor; se cachea por stats, no por id."""
+    return tabla_daño_por_stats(atacante.info.daño, atacante.info.ataque_especial, defensor.info.defensa)
 
 
 class Habilidad(ABC):
-    def __init__(self, nombre: str, probabilidad_esquivar: float = 0.25):
+    def __init__(self, nombre: str, probabilidad_esquivar: float = PROBABILIDAD_ESQUIVAR):
         self.nombre = nombre
         self.probabilidad_esquivar = probabilidad_esquivar
 
     @abstractmethod
-    def ejecutar(self, atacante: Personaje, defensor: Personaje) -> (int, str):
+    def rango(self, tabla: TablaDaño) -> RangoDaño:
         pass
 
-    def _calcular_esquivar(self) -> bool:
-        return random.random() < self.probabilidad_esquivar
+    @abstractmethod
+    def ejecutar(self, atacante: Personaje, defensor: Personaje, rng: random.Random = random,
+                 tabla: TablaDaño | None = None) -> (int, str):
+        pass
+
+    def calcular_daño(self, atacante: Personaje, defensor: Personaje, rng: random.Random = random,
+                      tabla: TablaDaño | None = None) -> int:
+        """Daño del ataque sin construir el mensaje; consume el RNG igual que ejecutar."""
+        return self.tirar_daño(tabla or tabla_daño(atacante, defensor), rng)
+
+    def tirar_daño(self, tabla: TablaDaño, rng: random.Random = random) -> int:
+        if self._calcular_esquivar(rng):
+            return 0
+        return max(1, int(self.rango(tabla).base * rng.uniform(FACTOR_DAÑO_MIN, FACTOR_DAÑO_MAX)))
+
+    def _calcular_esquivar(self, rng: random.Random = random) -> bool:
+        return rng.random() < self.probabilidad_esquivar
 
 
 class AtaqueNormal(Habilidad):
     def __init__(self):
         super().__init__(nombre="Ataque Normal")
 
-    def ejecutar(self, atacante: Personaje, defensor: Personaje) -> (int, str):
-        if self._calcular_esquivar():
-            return 0, f"{defensor.nombre} ha esquivado el ataque!"
+    def rango(self, tabla: TablaDaño) -> RangoDaño:
+        return tabla.ataque_normal
 
-        daño_base = atacante.info.daño - (defensor.info.defensa // 25)
-        daño_final = max(1, int(daño_base * random.uniform(0.85, 1.15)))
+    def ejecutar(self, atacante: Personaje, defensor: Personaje, rng: random.Random = random,
+                 tabla: TablaDaño | None = None) -> (int, str):
+        daño_final = self.calcular_daño(atacante, defensor, rng, tabla)
+        if not daño_final:
+            return 0, f"{defensor.nombre} ha esquivado el ataque!"
 
         return daño_final, f"{atacante.nombre} ataca a {defensor.nombre} y causa {daño_final} de daño."
 
@@ -34,31 +92,103 @@ class AtaqueEspecial(Habilidad):
     def __init__(self):
         super().__init__(nombre="Ataque Especial")
 
-    def ejecutar(self, atacante: Personaje, defensor: Personaje) -> (int, str):
-        if self._calcular_esquivar():
-            return 0, f"{defensor.nombre} ha esquivado el ataque especial!"
-
+    def rango(self, tabla: TablaDaño) -> RangoDaño:
+        return tabla.ataque_especial
 
-        daño_base = atacante.info.ataque_especial - (defensor.info.defensa // 25)
-        daño_final = max(1, int(daño_base * random.uniform(0.85, 1.15)))
+    def ejecutar(self, atacante: Personaje, defensor: Personaje, rng: random.Random = random,
+                 tabla: TablaDaño | None = None) -> (int, str):
+        daño_final = self.calcular_daño(atacante, defensor, rng, tabla)
+        if not daño_final:
+            return 0, f"{defensor.nombre} ha esquivado el ataque especial!"
 
         return daño_final, f"{atacante.nombre} usa su habilidad especial contra {defensor.nombre} y causa {daño_final} de daño."
 
 
 class HabilidadFactory:
+    """Las habilidades no guardan estado, así que se comparte una única instancia de cada una."""
 
     def __init__(self):
         self._habilidades = {
-            "ataque_normal": AtaqueNormal,
-            "ataque_especial": AtaqueEspecial
+            "ataque_normal": AtaqueNormal(),
+            "ataque_especial": AtaqueEspecial()
         }
 
     def get_habilidad(self, nombre_habilidad: str) -> Habilidad:
-        habilidad_clase = self._habilidades.get(nombre_habilidad)
-        if not habilidad_clase:
+        habilidad = self._habilidades.get(nombre_habilidad)
+        if not habilidad:
             raise ValueError(f"Habilidad '{nombre_habilidad}' desconocida.")
-        return habilidad_clase()
+        return habilidad
 
 
 factory_habilidades = HabilidadFactory()
-
+ATAQUE_NORMAL = factory_habilidades.get_habilidad("ataque_normal")
+ATAQUE_ESPECIAL = factory_habilidades.get_habilidad("ataque_especial")
+
+
+
+def stats_de_batalla(p1: Personaje, p2: Personaje) -> List[List[int]]:
+    """Stats con las que se simula un partido; con la semilla bastan para repetirlo aunque cambie el catálogo."""
+    return [[p.info.daño, p.info.defensa, p.info.ataque_especial] for p in (p1, p2)]
+
+
+def con_stats(personaje: Personaje, stats: List[int]) -> Personaje:
+    daño, defensa, ataque_especial = stats
+    return personaje.model_copy(update={"info": InfoPersonaje(daño=daño, defensa=defensa,
+                                                               ataque_especial=ataque_especial)})
+
+
+def nueva_semilla() -> int:
+    """Semilla de 63 bits: cabe en una columna BigInteger con signo."""
+    return random.getrandbits(63)
+
+
+def simular_batalla(p1: Personaje, p2: Personaje, semilla: int | None = None,
+                    con_log: bool = False) -> (Personaje, List[str]):
+    """
+    Batalla automática entre dos IAs: p1 ataca primero y cada una usa el especial al azar.
+    Con la misma semilla el resultado es siempre el mismo, así que el log solo se
+    construye cuando se pide (con_log=True) y se puede regenerar más tarde.
+    """
+    rng = random.Random(semilla) if semilla is not None else random
+    tabla_1 = tabla_daño(p1, p2)
+    tabla_2 = tabla_daño(p2, p1)
+    hp1 = p1.info.defensa
+    hp2 = p2.info.defensa
+    spec1_usado = False
+    spec2_usado = False
+    log = [f"¡Comienza la simulación entre {p1.nombre} y {p2.nombre}!"] if con_log else []
+
+    while hp1 > 0 and hp2 > 0:
+        habilidad_1 = ATAQUE_NORMAL
+        if not spec1_usado and rng.random() < PROBABILIDAD_ESPECIAL_SIMULACION:
+            habilidad_1 = ATAQUE_ESPECIAL
+            spec1_usado = True
+
+        if con_log:
+            daño, msg = habilidad_1.ejecutar(p1, p2, rng, tabla_1)
+            log.append(msg)
+        else:
+            daño = habilidad_1.tirar_daño(tabla_1, rng)
+        hp2 = max(0, hp2 - daño)
+        if hp2 <= 0:
+            if con_log:
+                log.append(f"¡{p1.nombre} ha ganado la batalla!")
+            return p1, log
+
+        habilidad_2 = ATAQUE_NORMAL
+        if not spec2_usado and rng.random() < PROBABILIDAD_ESPECIAL_SIMULACION:
+            habilidad_2 = ATAQUE_ESPECIAL
+            spec2_usado = True
+
+        if con_log:
+            daño_ia, msg_ia = habilidad_2.ejecutar(p2, p1, rng, tabla_2)
+            log.append(msg_ia)
+        else:
+            daño_ia = habilidad_2.tirar_daño(tabla_2, rng)
+        hp1 = max(0, hp1 - daño_ia)
+        if hp1 <= 0:
+            if con_log:
+                log.append(f"¡{p2.nombre} ha ganado la batalla!")
+            return p2, log
+
+    return p1 if hp1 > 0 else p2, log
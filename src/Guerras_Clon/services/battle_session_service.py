@@ -0,0 +1,235 @@
+import json
+import random
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from prometheus_client import Counter, Gauge
+from redis import asyncio as redis_asyncio
+from redis.exceptions import WatchError
+from src.Guerras_Clon.api.schemas.star_wars_models import Personaje
+from src.Guerras_Clon.core.cache import CacheTTL
+from src.Guerras_Clon.core.config import settings
+from src.Guerras_Clon.services import battle_service
+
+MAX_LOG_BATALLA = 50
+PROBABILIDAD_ESPECIAL_IA = 0.5
+
+BATALLAS_ACTIVAS = Gauge("guerras_clon_batallas_activas", "Batallas 1v1 guardadas en memoria")
+BATALLAS_EXPULSADAS = Counter("guerras_clon_batallas_expulsadas", "Batallas 1v1 retiradas del almacén", ["motivo"])
+
+
+class SesionBatalla:
+    """
+    Estado interno de una batalla 1v1. Solo guarda ids, HP y flags; los
+    personajes completos se resuelven al construir la respuesta de la API.
+    El log es un buffer circular con las últimas MAX_LOG_BATALLA entradas.
+    `version` se incrementa en cada guardado para detectar turnos concurrentes.
+    """
+    __slots__ = (
+        "id_batalla", "propietario", "jugador_id", "oponente_id",
+        "hp_jugador", "hp_oponente", "especial_jugador", "especial_oponente",
+        "terminada", "log", "version"
+    )
+
+    def __init__(self, id_batalla: str, propietario: str, jugador: Personaje, oponente: Personaje):
+        self.id_batalla = id_batalla
+        self.propietario = propietario
+        self.jugador_id = jugador.id
+        self.oponente_id = oponente.id
+        self.hp_jugador = jugador.info.defensa
+        self.hp_oponente = oponente.info.defensa
+        self.especial_jugador = False
+        self.especial_oponente = False
+        self.terminada = False
+        self.log = deque([f"¡Comienza la batalla entre {jugador.nombre} y {oponente.nombre}!"],
+                         maxlen=MAX_LOG_BATALLA)
+        self.version = 0
+
+    def copiar(self) -> "SesionBatalla":
+        copia = SesionBatalla.__new__(SesionBatalla)
+        for campo in self.__slots__:
+            setattr(copia, campo, getattr(self, campo))
+        copia.log = deque(self.log, maxlen=MAX_LOG_BATALLA)
+        return copia
+
+    def a_dict(self) -> dict:
+        datos = {campo: getattr(self, campo) for campo in self.__slots__}
+        datos["log"] = list(self.log)
+        return datos
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> "SesionBatalla":
+        sesion = cls.__new__(cls)
+        for campo in cls.__slots__:
+            setattr(sesion, campo, datos[campo])
+        sesion.log = deque(datos["log"], maxlen=MAX_LOG_BATALLA)
+        return sesion
+
+
+class ConflictoSesionError(Exception):
+    """Otra petición guardó la batalla entre la lectura y la escritura."""
+
+
+class AlmacenSesiones(ABC):
+    """
+    Almacén de batallas 1v1. `obtener` devuelve una copia: los cambios solo se
+    publican con `guardar`, que falla con ConflictoSesionError si otra petición
+    guardó antes una versión más nueva (concurrencia optimista).
+    """
+
+    @abstractmethod
+    async def crear(self, propietario: str, jugador: Personaje, oponente: Personaje) -> SesionBatalla:
+        pass
+
+    @abstractmethod
+    async def obtener(self, id_batalla: str) -> SesionBatalla | None:
+        pass
+
+    @abstractmethod
+    async def guardar(self, sesion: SesionBatalla):
+        pass
+
+    @abstractmethod
+    async def finalizar(self, id_batalla: str):
+        pass
+
+    @staticmethod
+    def _nuevo_id() -> str:
+        return f"batalla_{uuid.uuid4().hex}"
+
+
+class AlmacenBatallasMemoria(AlmacenSesiones):
+    """
+    Almacén en el propio proceso: como máximo `max_batallas`, las inactivas
+    más de `ttl_segundos` caducan y las terminadas se retiran al acabar.
+    Guarda las propias SesionBatalla y entrega copias, sin pasar por dict.
+    """
+
+    def __init__(self, max_batallas: int = settings.BATTLE_SESSION_MAX,
+                 ttl_segundos: float = settings.BATTLE_SESSION_TTL_SECONDS):
+        self._sesiones = CacheTTL(max_batallas, ttl_segundos, renovar_al_leer=True, al_expulsar=self._al_expulsar)
+
+    def __len__(self) -> int:
+        return len(self._sesiones)
+
+    async def crear(self, propietario: str, jugador: Personaje, oponente: Personaje) -> SesionBatalla:
+        sesion = SesionBatalla(self._nuevo_id(), propietario, jugador, oponente)
+        self._sesiones.set(sesion.id_batalla, sesion.copiar())
+        BATALLAS_ACTIVAS.set(len(self._sesiones))
+        return sesion
+
+    async def obtener(self, id_batalla: str) -> SesionBatalla | None:
+        sesion = self._sesiones.get(id_batalla)
+        BATALLAS_ACTIVAS.set(len(self._sesiones))
+        return sesion.copiar() if sesion else None
+
+    async def guardar(self, sesion: SesionBatalla):
+        actual = self._sesiones.get(sesion.id_batalla, contar=False)
+        if actual is None or actual.version != sesion.version:
+            raise ConflictoSesionError(sesion.id_batalla)
+        sesion.version += 1
+        self._sesiones.set(sesion.id_batalla, sesion.copiar())
+
+    async def finalizar(self, id_batalla: str):
+        if self._sesiones.pop(id_batalla) is not None:
+            BATALLAS_EXPULSADAS.labels(motivo="terminada").inc()
+        BATALLAS_ACTIVAS.set(len(self._sesiones))
+
+    @staticmethod
+    def _al_expulsar(id_batalla: str, sesion: SesionBatalla, motivo: str):
+        BATALLAS_EXPULSADAS.labels(motivo=motivo).inc()
+
+
+class AlmacenBatallasRedis(AlmacenSesiones):
+    """
+    Almacén compartido por todos los workers en un servidor con protocolo Redis.
+    Cada batalla es una clave JSON con caducidad por inactividad; el límite de
+    tamaño lo impone la política de memoria del servidor. `guardar` usa
+    WATCH/MULTI/EXEC para que solo gane uno de dos turnos simultáneos.
+    """
+
+    def __init__(self, cliente: redis_asyncio.Redis, ttl_segundos: int = settings.BATTLE_SESSION_TTL_SECONDS,
+                 prefijo: str = "guerras_clon:batalla:"):
+        self._redis = cliente
+        self._ttl = ttl_segundos
+        self._prefijo = prefijo
+
+    def _clave(self, id_batalla: str) -> str:
+        return f"{self._prefijo}{id_batalla}"
+
+    async def crear(self, propietario: str, jugador: Personaje, oponente: Personaje) -> SesionBatalla:
+        sesion = SesionBatalla(self._nuevo_id(), propietario, jugador, oponente)
+        await self._redis.set(self._clave(sesion.id_batalla), json.dumps(sesion.a_dict()), ex=self._ttl)
+        return sesion
+
+    async def obtener(self, id_batalla: str) -> SesionBatalla | None:
+        clave = self._clave(id_batalla)
+        datos = await self._redis.get(clave)
+        if datos is None:
+            return None
+        await self._redis.expire(clave, self._ttl)
+        return SesionBatalla.desde_dict(json.loads(datos))
+
+    async def guardar(self, sesion: SesionBatalla):
+        clave = self._clave(sesion.id_batalla)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(clave)
+                actual = await pipe.get(clave)
+                if actual is None or json.loads(actual)["version"] != sesion.version:
+                    raise ConflictoSesionError(sesion.id_batalla)
+
+                sesion.version += 1
+                pipe.multi()
+                pipe.set(clave, json.dumps(sesion.a_dict()), ex=self._ttl)
+                await pipe.execute()
+            except WatchError:
+                sesion.version -= 1
+                raise ConflictoSesionError(sesion.id_batalla)
+
+    async def finalizar(self, id_batalla: str):
+        if await self._redis.delete(self._clave(id_batalla)):
+            BATALLAS_EXPULSADAS.labels(motivo="terminada").inc()
+
+
+def crear_almacen() -> AlmacenSesiones:
+    if settings.BATTLE_SESSION_BACKEND == "redis":
+        return AlmacenBatallasRedis(redis_asyncio.from_url(settings.REDIS_URL))
+    return AlmacenBatallasMemoria()
+
+
+def resolver_turno(sesion: SesionBatalla, jugador: Personaje, oponente: Personaje, accion_jugador: str):
+    """Aplica la acción del jugador y, si la batalla sigue, la respuesta de la IA."""
+    log = sesion.log
+
+    if accion_jugador == "ataque_especial" and sesion.especial_jugador:
+        log.append(f"{jugador.nombre} intenta usar su ataque especial, ¡pero ya lo ha usado!")
+        accion_jugador = "ataque_normal"
+
+    habilidad_jugador = battle_service.factory_habilidades.get_habilidad(accion_jugador)
+    daño, msg = habilidad_jugador.ejecutar(jugador, oponente, tabla=battle_service.tabla_daño(jugador, oponente))
+
+    sesion.hp_oponente = max(0, sesion.hp_oponente - daño)
+    log.append(msg)
+    if accion_jugador == "ataque_especial":
+        sesion.especial_jugador = True
+
+    if sesion.hp_oponente <= 0:
+        sesion.terminada = True
+        log.append(f"¡{jugador.nombre} ha ganado la batalla!")
+        return
+
+    accion_ia = "ataque_normal"
+    if not sesion.especial_oponente and random.random() < PROBABILIDAD_ESPECIAL_IA:
+        accion_ia = "ataque_especial"
+        sesion.especial_oponente = True
+
+    habilidad_ia = battle_service.factory_habilidades.get_habilidad(accion_ia)
+    daño_ia, msg_ia = habilidad_ia.ejecutar(oponente, jugador, tabla=battle_service.tabla_daño(oponente, jugador))
+
+    sesion.hp_jugador = max(0, sesion.hp_jugador - daño_ia)
+    log.append(msg_ia)
+
+    if sesion.hp_jugador <= 0:
+        sesion.terminada = True
+        log.append(f"¡{oponente.nombre} ha ganado la batalla!")
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.Guerras_Clon.bd import models
+from src.Guerras_Clon.core.cache import CacheTTL
+from src.Guerras_Clon.core.config import settings
+
+TOP_N = 20
+VENTANAS = {
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    "all": None,
+}
+
+# Top-N por ventana. Los torneos que termina este worker se añaden al momento;
+# el TTL recoge los de otros workers y los que salen de las ventanas recientes.
+_top_por_ventana = CacheTTL(len(VENTANAS), settings.LEADERBOARD_CACHE_TTL_SECONDS)
+
+
+def _utc(momento: datetime) -> datetime:
+    return momento if momento.tzinfo else momento.replace(tzinfo=timezone.utc)
+
+
+def _inicio_ventana(ventana: str) -> datetime | None:
+    duracion = VENTANAS[ventana]
+    return datetime.now(timezone.utc) - duracion if duracion else None
+
+
+async def _consultar(db: AsyncSession, ventana: str) -> list[dict]:
+    query = (
+        select(
+            models.Tournament.name.label("tournament_name"),
+            models.User.username.label("winner_name"),
+            models.Tournament.duration_seconds,
+            models.Tournament.end_time.label("completed_at")
+        )
+        .join(models.User, models.Tournament.winner_id == models.User.id)
+        .where(
+            models.Tournament.status == "completed",
+            models.Tournament.duration_seconds.isnot(None)
+        )
+    )
+    desde = _inicio_ventana(ventana)
+    if desde:
+        query = query.where(models.Tournament.end_time >= desde)
+
+    result = await db.execute(query.order_by(models.Tournament.duration_seconds.asc()).limit(TOP_N))
+    return [{**fila, "completed_at": _utc(fila["completed_at"])} for fila in result.mappings()]
+
+
+async def obtener_leaderboard(db: AsyncSession, ventana: str = "all") -> list[dict]:
+    entradas = _top_por_ventana.get(ventana)
+    if entradas is None:
+        entradas = await _consultar(db, ventana)
+        _top_por_ventana.set(ventana, entradas)
+
+    desde = _inicio_ventana(ventana)
+    return [e for e in entradas if desde is None or e["completed_at"] >= desde]
+
+
+def duracion_torneo(tournament: models.Tournament) -> float | None:
+    if tournament.start_time is None or tournament.end_time is None:
+        return None
+    return (_utc(tournament.end_time) - _utc(tournament.start_time)).total_seconds()
+
+
+def registrar_finalizado(entrada: dict):
+    """Incorpora un torneo recién terminado (y ya confirmado) a los top-N cacheados."""
+    for ventana in VENTANAS:
+        # Se modifica la lista en sitio para no renovar su caducidad.
+        entradas = _top_por_ventana.get(ventana, contar=False)
+        if entradas is not None:
+            entradas.append(entrada)
+            entradas.sort(key=lambda e: e["duration_seconds"])
+            del entradas[TOP_N:]
+
+
+def invalidar():
+    _top_por_ventana.clear()
+
+
+async def rellenar_duraciones(db: AsyncSession) -> int:
+    """Calcula duration_seconds de los torneos terminados antes de existir la columna."""
+    result = await db.execute(
+        select(models.Tournament.id, models.Tournament.start_time, models.Tournament.end_time)
+        .where(
+            models.Tournament.status == "completed",
+            models.Tournament.duration_seconds.is_(None),
+            models.Tournament.start_time.isnot(None),
+            models.Tournament.end_time.isnot(None)
+        )
+    )
+    filas = [
+        {"id": t_id, "duration_seconds": (_utc(fin) - _utc(inicio)).total_seconds()}
+        for t_id, inicio, fin in result.all()
+    ]
+    if filas:
+        await db.execute(update(models.Tournament), filas)
+    await db.commit()
+    return len(filas)
@@ -0,0 +1,69 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import List
+from src.Guerras_Clon.api.schemas.star_wars_models import Personaje, MatrizMatchupsSchema
+from src.Guerras_Clon.services import battle_service, simulation_service, solver_service, swapi_service
+
+logger = logging.getLogger(__name__)
+
+BATALLAS_POR_MATCHUP = 5000
+
+MOTORES = {
+    "exacto": solver_service.probabilidad_victoria_exacta,
+    "monte_carlo": lambda p1, p2: simulation_service.probabilidad_victoria(p1, p2, BATALLAS_POR_MATCHUP, semilla=0),
+}
+MOTOR_POR_DEFECTO = "exacto"
+
+_matrices_cacheadas: dict[str, MatrizMatchupsSchema] = {}
+_lock = asyncio.Lock()
+
+
+def calcular_huella(personajes: List[Personaje], motor: str = MOTOR_POR_DEFECTO) -> str:
+    """
+    Identifica la combinación de plantilla y reglas de combate. Si cambia
+    cualquiera de las dos, la matriz cacheada deja de ser válida.
+    """
+    datos = {
+        "personajes": [[p.id, p.info.daño, p.info.defensa, p.info.ataque_especial] for p in personajes],
+        "motor": motor,
+        "reglas": [
+            battle_service.VERSION_REGLAS,
+            battle_service.PROBABILIDAD_ESQUIVAR,
+            battle_service.FACTOR_DAÑO_MIN,
+            battle_service.FACTOR_DAÑO_MAX,
+            battle_service.DIVISOR_DEFENSA,
+            battle_service.PROBABILIDAD_ESPECIAL_SIMULACION,
+        ],
+    }
+    return hashlib.sha256(json.dumps(datos).encode()).hexdigest()[:16]
+
+
+def calcular_matriz(personajes: List[Personaje], motor: str = MOTOR_POR_DEFECTO) -> MatrizMatchupsSchema:
+    probabilidad = MOTORES.get(motor)
+    if not probabilidad:
+        raise ValueError(f"Motor '{motor}' desconocido.")
+
+    probabilidades = [[probabilidad(p1, p2) for p2 in personajes] for p1 in personajes]
+    return MatrizMatchupsSchema(
+        version=calcular_huella(personajes, motor),
+        personajes=[p.id for p in personajes],
+        probabilidades=probabilidades
+    )
+
+
+async def obtener_matriz_matchups(motor: str = MOTOR_POR_DEFECTO) -> MatrizMatchupsSchema:
+    personajes = await swapi_service.get_all_characters()
+    huella = calcular_huella(personajes, motor)
+    matriz = _matrices_cacheadas.get(motor)
+    if matriz is not None and matriz.version == huella:
+        return matriz
+
+    async with _lock:
+        matriz = _matrices_cacheadas.get(motor)
+        if matriz is None or matriz.version != huella:
+            logger.info(f"Calculando matriz de matchups '{motor}' ({len(personajes)} personajes, versión {huella})")
+            matriz = await asyncio.to_thread(calcular_matriz, personajes, motor)
+            _matrices_cacheadas[motor] = matriz
+    return matriz
@@ -0,0 +1,61 @@
+import numpy as np
+from src.Guerras_Clon.api.schemas.star_wars_models import Personaje
+from src.Guerras_Clon.services import battle_service
+
+
+def _daños_base(atacante: Personaje, defensor: Personaje) -> (int, int):
+    tabla = battle_service.tabla_daño(atacante, defensor)
+    return tabla.ataque_normal.base, tabla.ataque_especial.base
+
+
+def _tirar_ataques(rng: np.random.Generator, especial_usado: np.ndarray,
+                   base_normal: int, base_especial: int) -> np.ndarray:
+    """
+    Resuelve un ataque para cada batalla activa con las mismas reglas que
+    AtaqueNormal/AtaqueEspecial. Marca en `especial_usado` las que gastan el especial.
+    """
+    n = especial_usado.shape[0]
+    usa_especial = ~especial_usado & (rng.random(n) < battle_service.PROBABILIDAD_ESPECIAL_SIMULACION)
+    especial_usado |= usa_especial
+
+    esquiva = rng.random(n) < battle_service.PROBABILIDAD_ESQUIVAR
+    factor = rng.uniform(battle_service.FACTOR_DAÑO_MIN, battle_service.FACTOR_DAÑO_MAX, n)
+    base = np.where(usa_especial, base_especial, base_normal)
+    daño = np.maximum(1, np.trunc(base * factor).astype(np.int64))
+
+    return np.where(esquiva, 0, daño)
+
+
+def simular_batallas(p1: Personaje, p2: Personaje, n: int, semilla: int | None = None) -> np.ndarray:
+    """
+    Simula `n` batallas independientes entre p1 y p2 a la vez.
+    Devuelve un array booleano de longitud n: True donde gana p1.
+    """
+    rng = np.random.default_rng(semilla)
+    normal_1, especial_1 = _daños_base(p1, p2)
+    normal_2, especial_2 = _daños_base(p2, p1)
+
+    gana_p1 = np.zeros(n, dtype=bool)
+    activas = np.arange(n)
+    hp1 = np.full(n, p1.info.defensa, dtype=np.int64)
+    hp2 = np.full(n, p2.info.defensa, dtype=np.int64)
+    spec1 = np.zeros(n, dtype=bool)
+    spec2 = np.zeros(n, dtype=bool)
+
+    while activas.size:
+        hp2 -= _tirar_ataques(rng, spec1, normal_1, especial_1)
+        terminadas = hp2 <= 0
+        gana_p1[activas[terminadas]] = True
+
+        sigue = ~terminadas
+        activas, hp1, hp2, spec1, spec2 = activas[sigue], hp1[sigue], hp2[sigue], spec1[sigue], spec2[sigue]
+
+        hp1 -= _tirar_ataques(rng, spec2, normal_2, especial_2)
+        sigue = hp1 > 0
+        activas, hp1, hp2, spec1, spec2 = activas[sigue], hp1[sigue], hp2[sigue], spec1[sigue], spec2[sigue]
+
+    return gana_p1
+
+
+def probabilidad_victoria(p1: Personaje, p2: Personaje, n: int = 10000, semilla: int | None = None) -> float:
+    return float(simular_batallas(p1, p2, n, semilla).mean())
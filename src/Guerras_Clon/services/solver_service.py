@@ -0,0 +1,136 @@
+from functools import lru_cache
+import math
+import numpy as np
+from src.Guerras_Clon.api.schemas.star_wars_models import Personaje
+from src.Guerras_Clon.services import battle_service
+
+# Por debajo de esta masa de probabilidad se considera que la cadena ha terminado.
+EPSILON = 1e-12
+
+
+def distribucion_daño(daño_base: int) -> np.ndarray:
+    """
+    Distribución exacta de max(1, int(daño_base * U)) con U ~ Uniforme(FACTOR_DAÑO_MIN, FACTOR_DAÑO_MAX).
+    El índice del array es el daño causado.
+    """
+    if daño_base <= 0:
+        return np.array([0.0, 1.0])
+
+    inferior = daño_base * battle_service.FACTOR_DAÑO_MIN
+    superior = daño_base * battle_service.FACTOR_DAÑO_MAX
+    pmf = np.zeros(math.floor(superior) + 1)
+    for k in range(math.floor(inferior), math.floor(superior) + 1):
+        tramo = min(k + 1, superior) - max(k, inferior)
+        pmf[k] = max(0.0, tramo) / (superior - inferior)
+
+    pmf[1] += pmf[0]
+    pmf[0] = 0.0
+    return pmf
+
+
+def _tiempos_de_victoria(atacante: (int, int), defensa_rival: int):
+    """
+    Genera P(T = k) para k = 1, 2, ..., donde T es el número de ataques que
+    necesita el atacante para dejar al rival a 0 HP.
+
+    Cada ataque se esquiva o aplica el daño de AtaqueNormal/AtaqueEspecial, y el
+    especial se usa una sola vez con el mismo 30% que la simulación de torneos.
+    Como el daño nunca es negativo, T > k equivale a que el daño acumulado tras k
+    ataques no llegue a los HP del rival; y como el orden no altera la suma, ese
+    daño es k ataques normales o k-1 normales más el especial.
+    """
+    daño, ataque_especial = atacante
+    hp = defensa_rival
+    tabla = battle_service.tabla_daño_por_stats(daño, ataque_especial, defensa_rival)
+    p_esquivar = battle_service.PROBABILIDAD_ESQUIVAR
+    sin_especial = 1 - battle_service.PROBABILIDAD_ESPECIAL_SIMULACION
+
+    # Distribución del daño de un ataque, incluida la probabilidad de esquivarlo.
+    ataque_normal = (1 - p_esquivar) * distribucion_daño(tabla.ataque_normal.base)
+    ataque_normal[0] += p_esquivar
+    ataque_especial_pmf = (1 - p_esquivar) * distribucion_daño(tabla.ataque_especial.base)
+    ataque_especial_pmf[0] += p_esquivar
+
+    # sobrevive_tras_x[j]: probabilidad de que un ataque x no mate partiendo de j de daño acumulado.
+    def _sobrevive_tras(pmf: np.ndarray) -> np.ndarray:
+        acumulada = np.cumsum(np.pad(pmf, (0, max(0, hp - len(pmf)))))[:hp]
+        return acumulada[::-1]
+
+    sobrevive_tras_normal = _sobrevive_tras(ataque_normal)
+    sobrevive_tras_especial = _sobrevive_tras(ataque_especial_pmf)
+
+    # Daño acumulado tras k-1 ataques normales, truncado a los estados con vida.
+    normales = np.zeros(hp)
+    normales[0] = 1.0
+    restante = 1.0
+    k = 1
+
+    while True:
+        vivo_sin_especial = normales @ sobrevive_tras_normal
+        vivo_con_especial = normales @ sobrevive_tras_especial
+        p_sin = sin_especial ** k
+        vivo = p_sin * vivo_sin_especial + (1 - p_sin) * vivo_con_especial
+        yield restante - vivo
+
+        restante = vivo
+        normales = np.convolve(normales, ataque_normal)[:hp]
+        k += 1
+
+
+class _CadenaAtaques:
+    """Prefijo memoizado de P(T = k) para un atacante contra una defensa concreta."""
+
+    def __init__(self, atacante: (int, int), defensa_rival: int):
+        self._tiempos = _tiempos_de_victoria(atacante, defensa_rival)
+        self._masas = []
+
+    def masa(self, k: int) -> float:
+        while len(self._masas) <= k:
+            self._masas.append(next(self._tiempos))
+        return self._masas[k]
+
+
+@lru_cache(maxsize=4096)
+def _cadena(daño: int, ataque_especial: int, defensa_rival: int) -> _CadenaAtaques:
+    return _CadenaAtaques((daño, ataque_especial), defensa_rival)
+
+
+@lru_cache(maxsize=4096)
+def _probabilidad_victoria(stats_1: (int, int, int), stats_2: (int, int, int)) -> float:
+    daño_1, defensa_1, especial_1 = stats_1
+    daño_2, defensa_2, especial_2 = stats_2
+    cadena_1 = _cadena(daño_1, especial_1, defensa_2)
+    cadena_2 = _cadena(daño_2, especial_2, defensa_1)
+
+    victoria_1 = 0.0
+    restante_1 = 1.0
+    # P(T2 >= k): p1 ataca primero, así que gana si T1 <= T2.
+    restante_2 = 1.0
+    k = 0
+
+    while restante_1 > EPSILON and restante_2 > EPSILON:
+        p_1 = cadena_1.masa(k)
+        victoria_1 += p_1 * restante_2
+        restante_1 -= p_1
+        restante_2 -= cadena_2.masa(k)
+        k += 1
+
+    # Acota el error de redondeo acumulado.
+    return min(1.0, max(0.0, victoria_1))
+
+
+def _stats(personaje: Personaje) -> (int, int, int):
+    return personaje.info.daño, personaje.info.defensa, personaje.info.ataque_especial
+
+
+def probabilidad_victoria_exacta(p1: Personaje, p2: Personaje) -> float:
+    """
+    Probabilidad exacta de que p1 gane a p2 atacando primero.
+
+    La batalla es una cadena de Markov sobre (hp1, hp2, especial 1, especial 2, turno),
+    pero el daño que recibe cada personaje depende solo de los ataques del rival.
+    Por eso se resuelve como dos cadenas independientes sobre (daño acumulado,
+    especial usado), avanzadas en paralelo: p1 gana si necesita como mucho
+    tantos ataques como p2.
+    """
+    return _probabilidad_victoria(_stats(p1), _stats(p2))
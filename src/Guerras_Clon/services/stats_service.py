@@ -0,0 +1,110 @@
+import random
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.Guerras_Clon.bd import models
+
+CONTADOR_USUARIOS = "users"
+CONTADOR_AUDITORIA = "audit_logs"
+# Un contador fragmentado se reparte en varias filas ("audit_logs", "audit_logs#1"...) que
+# se suman al leer: las peticiones concurrentes no esperan todas al bloqueo de la misma fila.
+FRAGMENTOS_CONTADOR = 16
+SEPARADOR_FRAGMENTO = "#"
+
+
+def _insert(db: AsyncSession, modelo):
+    """INSERT con soporte de ON CONFLICT del dialecto en uso (Postgres en producción, sqlite en pruebas)."""
+    dialecto = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    return dialecto.insert(modelo)
+
+
+def truncar_a_hora(momento: datetime) -> datetime:
+    return momento.replace(minute=0, second=0, microsecond=0)
+
+
+def _fragmento(nombre: str) -> str:
+    n = random.randrange(FRAGMENTOS_CONTADOR)
+    return nombre if n == 0 else f"{nombre}{SEPARADOR_FRAGMENTO}{n}"
+
+
+async def incrementar(db: AsyncSession, nombre: str, delta: int = 1, fragmentado: bool = False):
+    """Suma `delta` al contador dentro de la transacción de `db`; con `fragmentado`, a una fila al azar."""
+    stmt = _insert(db, models.StatsCounter).values(name=_fragmento(nombre) if fragmentado else nombre, value=delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"value": models.StatsCounter.value + stmt.excluded.value}
+    )
+    await db.execute(stmt)
+
+
+async def registrar_eventos(db: AsyncSession, entradas: list[dict]):
+    """
+    Actualiza el total de auditoría y la agregación por hora y acción con un lote de
+    registros (los mismos dicts que se insertan en AuditLog). Agrupa antes de escribir,
+    así que un lote cuesta una sentencia por cada par (hora, acción) distinto.
+    """
+    if not entradas:
+        return
+
+    por_hora = Counter((truncar_a_hora(e["timestamp"]), e["action"]) for e in entradas)
+    stmt = _insert(db, models.AuditActivityHourly).values([
+        {"hour": hora, "action": accion, "count": n} for (hora, accion), n in por_hora.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["hour", "action"],
+        set_={"count": models.AuditActivityHourly.count + stmt.excluded.count}
+    )
+    await db.execute(stmt)
+    # En modo síncrono esto corre en la transacción de cada petición auditada: fragmentado.
+    await incrementar(db, CONTADOR_AUDITORIA, len(entradas), fragmentado=True)
+
+
+async def inicializar(db: AsyncSession):
+    """
+    Se ejecuta al arrancar. El total de usuarios se recalcula siempre (un único COUNT al
+    arrancar, y así cubre los usuarios creados por scripts); el de auditoría y la agregación
+    por hora solo se reconstruyen la primera vez, a partir de la tabla existente.
+    """
+    total_usuarios = await db.scalar(select(func.count(models.User.id)))
+    stmt = _insert(db, models.StatsCounter).values(name=CONTADOR_USUARIOS, value=total_usuarios)
+    await db.execute(stmt.on_conflict_do_update(index_elements=["name"], set_={"value": stmt.excluded.value}))
+
+    if CONTADOR_AUDITORIA not in await obtener_contadores(db):
+        result = await db.stream(select(models.AuditLog.timestamp, models.AuditLog.action)
+                                 .where(models.AuditLog.timestamp.isnot(None)))
+        por_hora = Counter()
+        async for timestamp, action in result:
+            por_hora[(truncar_a_hora(timestamp), action)] += 1
+        # on_conflict_do_nothing: si varios workers arrancan a la vez, el primero gana y los datos son iguales.
+        if por_hora:
+            await db.execute(_insert(db, models.AuditActivityHourly).values([
+                {"hour": hora, "action": accion, "count": n} for (hora, accion), n in por_hora.items()
+            ]).on_conflict_do_nothing())
+        total_auditoria = await db.scalar(select(func.count(models.AuditLog.id)))
+        await db.execute(_insert(db, models.StatsCounter)
+                         .values(name=CONTADOR_AUDITORIA, value=total_auditoria).on_conflict_do_nothing())
+
+    await db.commit()
+
+
+async def obtener_contadores(db: AsyncSession) -> dict[str, int]:
+    """Totales por contador, con los fragmentos ya sumados."""
+    result = await db.execute(select(models.StatsCounter.name, models.StatsCounter.value))
+    contadores = Counter()
+    for nombre, valor in result.all():
+        contadores[nombre.split(SEPARADOR_FRAGMENTO, 1)[0]] += valor
+    return dict(contadores)
+
+
+async def obtener_actividad(db: AsyncSession, desde: datetime, hasta: datetime,
+                            action: str | None = None) -> list[models.AuditActivityHourly]:
+    query = select(models.AuditActivityHourly).where(
+        models.AuditActivityHourly.hour >= truncar_a_hora(desde),
+        models.AuditActivityHourly.hour < hasta
+    )
+    if action:
+        query = query.where(models.AuditActivityHourly.action == action)
+    result = await db.execute(query.order_by(models.AuditActivityHourly.hour, models.AuditActivityHourly.action))
+    return result.scalars().all()
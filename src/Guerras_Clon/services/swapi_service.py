@@ -1,97 +1,177 @@
-from src.Guerras_Clon.api.schemas.star_wars_models import Mundo, Personaje, InfoPersonaje
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from pydantic import TypeAdapter
+from src.Guerras_Clon.api.schemas.star_wars_models import Mundo, Personaje
+from src.Guerras_Clon.core.config import settings
+from types import MappingProxyType
 # --- 1. AÑADIR IMPORT ---
-from typing import List
+from typing import Iterable, List
 # ------------------------
 
+logger = logging.getLogger(__name__)
+
 BASE_URL_FRONTEND = "http://localhost:3000/imagenes"
+RUTA_CATALOGO_POR_DEFECTO = Path(__file__).resolve().parent.parent / "data" / "catalogo.json"
+# Héroes y villanos de cada mundo que se ofrecen para elegir y como oponentes.
+PERSONAJES_POR_BANDO = 3
+
+_ADAPTADOR_MUNDOS = TypeAdapter(List[Mundo])
+_ADAPTADOR_PERSONAJES_MUNDO = TypeAdapter(dict[str, List[Personaje]])
+
+
+class CatalogoPersonajes:
+    """
+    Catálogo inmutable de mundos y personajes con índices construidos una sola vez:
+    por id, por mundo y por (mundo, tipo), más la selección de héroes y
+    villanos que se ofrece en cada mundo. Todas las lecturas son O(1).
+    `version` identifica el contenido: cambia si y solo si cambian los datos.
+    """
+    __slots__ = ("version", "mundos", "personajes", "por_id", "_por_mundo", "_por_mundo_tipo", "_seleccion",
+                 "_json")
+
+    def __init__(self, personajes: Iterable[Personaje], mundos: Iterable[Mundo] = (), version: str = ""):
+        self.version = version
+        self.mundos = MappingProxyType({m.id: m for m in mundos})
+        self.personajes = tuple(personajes)
+        self.por_id = MappingProxyType({p.id: p for p in self.personajes})
+
+        por_mundo, por_mundo_tipo = {}, {}
+        for p in self.personajes:
+            por_mundo.setdefault(p.mundo_id, []).append(p)
+            por_mundo_tipo.setdefault((p.mundo_id, p.tipo), []).append(p)
+        self._por_mundo = {clave: tuple(lista) for clave, lista in por_mundo.items()}
+        self._por_mundo_tipo = {clave: tuple(lista) for clave, lista in por_mundo_tipo.items()}
+        self._seleccion = {clave: lista[:PERSONAJES_POR_BANDO] for clave, lista in self._por_mundo_tipo.items()}
+        self._json = {}
+
+    def __len__(self) -> int:
+        return len(self.personajes)
+
+    def obtener(self, character_id: str) -> Personaje | None:
+        return self.por_id.get(character_id)
+
+    def de_mundo(self, mundo_id: int) -> tuple[Personaje, ...]:
+        return self._por_mundo.get(mundo_id, ())
+
+    def de_mundo_y_tipo(self, mundo_id: int, tipo: str) -> tuple[Personaje, ...]:
+        return self._por_mundo_tipo.get((mundo_id, tipo), ())
+
+    def seleccion(self, mundo_id: int, tipo: str) -> tuple[Personaje, ...]:
+        """Los primeros PERSONAJES_POR_BANDO personajes del tipo en ese mundo."""
+        return self._seleccion.get((mundo_id, tipo), ())
+
+    def personajes_de_mundo(self, mundo_id: int) -> dict[str, List[Personaje]]:
+        return {
+            "heroes": list(self.seleccion(mundo_id, "heroe")),
+            "villanos": list(self.seleccion(mundo_id, "villano"))
+        }
+
+    def json_mundos(self) -> bytes:
+        """JSON de la lista de mundos, serializado una sola vez por versión del catálogo."""
+        if "mundos" not in self._json:
+            self._json["mundos"] = _ADAPTADOR_MUNDOS.dump_json(list(self.mundos.values()))
+        return self._json["mundos"]
+
+    def json_personajes_de_mundo(self, mundo_id: int) -> bytes:
+        """JSON de la selección de héroes y villanos de un mundo, serializado una sola vez."""
+        clave = ("personajes", mundo_id)
+        if clave not in self._json:
+            self._json[clave] = _ADAPTADOR_PERSONAJES_MUNDO.dump_json(self.personajes_de_mundo(mundo_id))
+        return self._json[clave]
+
+
+def cargar_catalogo(ruta: Path) -> CatalogoPersonajes:
+    """
+    Lee y valida el fichero de datos. Las imágenes se guardan como nombre de
+    fichero y se resuelven contra BASE_URL_FRONTEND. Lanza ValueError si los
+    datos no son coherentes, para no publicar nunca un catálogo a medias.
+    """
+    contenido = Path(ruta).read_bytes()
+    datos = json.loads(contenido)
+
+    mundos = [Mundo(**{**m, "imagen": f"{BASE_URL_FRONTEND}/{m['imagen']}"}) for m in datos["mundos"]]
+    personajes = [Personaje(**{**p, "imagen": f"{BASE_URL_FRONTEND}/{p['imagen']}"}) for p in datos["personajes"]]
 
-DATOS_MUNDOS = {
-    1: Mundo(id=1, nombre="Tatooine", imagen=f"{BASE_URL_FRONTEND}/tatooine.png"),
-    2: Mundo(id=2, nombre="Hoth", imagen=f"{BASE_URL_FRONTEND}/hoth.png"),
-    3: Mundo(id=3, nombre="Endor", imagen=f"{BASE_URL_FRONTEND}/endor.png"),
-}
-
-DATOS_PERSONAJES = [
-    Personaje(id="luke", nombre="Luke Skywalker", tipo="heroe", mundo_id=1,
-              info=InfoPersonaje(daño=85, defensa=670, ataque_especial=160),
-              imagen=f"{BASE_URL_FRONTEND}/luke.png"),
-    Personaje(id="obiwan", nombre="Obi-Wan Kenobi", tipo="heroe", mundo_id=1,
-              info=InfoPersonaje(daño=80, defensa=690, ataque_especial=150),
-              imagen=f"{BASE_URL_FRONTEND}/obiwan.png"),
-    Personaje(id="r2d2", nombre="R2-D2", tipo="heroe", mundo_id=1,
-              info=InfoPersonaje(daño=30, defensa=670, ataque_especial=100),
-              imagen=f"{BASE_URL_FRONTEND}/r2d2.png"),
-
-    Personaje(id="jabba", nombre="Jabba the Hutt", tipo="villano", mundo_id=1,
-              info=InfoPersonaje(daño=60, defensa=680, ataque_especial=100),
-              imagen=f"{BASE_URL_FRONTEND}/jabba.png"),
-    Personaje(id="tusken", nombre="Tusken Raider", tipo="villano", mundo_id=1,
-              info=InfoPersonaje(daño=65, defensa=650, ataque_especial=70),
-              imagen=f"{BASE_URL_FRONTEND}/tusken.png"),
-    Personaje(id="greedo", nombre="Greedo", tipo="villano", mundo_id=1,
-              info=InfoPersonaje(daño=55, defensa=640, ataque_especial=60),
-              imagen=f"{BASE_URL_FRONTEND}/greedo.png"),
-
-    # --- Mundo 2: Hoth ---
-    Personaje(id="leia", nombre="Princess Leia (Hoth)", tipo="heroe", mundo_id=2,
-              info=InfoPersonaje(daño=70, defensa=665, ataque_especial=130),
-              imagen=f"{BASE_URL_FRONTEND}/leia.png"),
-    Personaje(id="han", nombre="Han Solo (Hoth)", tipo="heroe", mundo_id=2,
-              info=InfoPersonaje(daño=75, defensa=660, ataque_especial=140),
-              imagen=f"{BASE_URL_FRONTEND}/han.png"),
-    Personaje(id="chewie", nombre="Chewbacca", tipo="heroe", mundo_id=2,
-              info=InfoPersonaje(daño=90, defensa=680, ataque_especial=120),
-              imagen=f"{BASE_URL_FRONTEND}/chewie.png"),
-
-    Personaje(id="vader", nombre="Darth Vader", tipo="villano", mundo_id=2,
-              info=InfoPersonaje(daño=100, defensa=690, ataque_especial=180),
-              imagen=f"{BASE_URL_FRONTEND}/vader.png"),
-    Personaje(id="veers", nombre="General Veers", tipo="villano", mundo_id=2,
-              info=InfoPersonaje(daño=70, defensa=670, ataque_especial=110),
-              imagen=f"{BASE_URL_FRONTEND}/veers.png"),
-    Personaje(id="wampa", nombre="Wampa", tipo="villano", mundo_id=2,
-              info=InfoPersonaje(daño=80, defensa=1360, ataque_especial=90),
-              imagen=f"{BASE_URL_FRONTEND}/wampa.png"),
-
-    # --- Mundo 3: Endor ---
-    Personaje(id="wicket", nombre="Wicket W. Warrick", tipo="heroe", mundo_id=3,
-              info=InfoPersonaje(daño=50, defensa=650, ataque_especial=80),
-              imagen=f"{BASE_URL_FRONTEND}/wicket.png"),
-    Personaje(id="lando", nombre="Lando Calrissian", tipo="heroe", mundo_id=3,
-              info=InfoPersonaje(daño=70, defensa=665, ataque_especial=135),
-              imagen=f"{BASE_URL_FRONTEND}/lando.png"),
-    Personaje(id="ackbar", nombre="Admiral Ackbar", tipo="heroe", mundo_id=3,
-              info=InfoPersonaje(daño=60, defensa=670, ataque_especial=110),
-              imagen=f"{BASE_URL_FRONTEND}/ackbar.png"),
-
-    Personaje(id="palpatine", nombre="Emperador Palpatine", tipo="villano", mundo_id=3,
-              info=InfoPersonaje(daño=80, defensa=680, ataque_especial=200),
-              imagen=f"{BASE_URL_FRONTEND}/palpatine.png"),
-    Personaje(id="scout", nombre="Scout Trooper", tipo="villano", mundo_id=3,
-              info=InfoPersonaje(daño=65, defensa=655, ataque_especial=75),
-              imagen=f"{BASE_URL_FRONTEND}/scout.png"),
-    Personaje(id="moff", nombre="Moff Jerjerrod", tipo="villano", mundo_id=3,
-              info=InfoPersonaje(daño=40, defensa=660, ataque_especial=50),
-              imagen=f"{BASE_URL_FRONTEND}/moff.png"),
-]
+    ids_mundos = {m.id for m in mundos}
+    if len(ids_mundos) != len(mundos) or len({p.id for p in personajes}) != len(personajes):
+        raise ValueError("El catálogo tiene ids duplicados.")
+    huerfanos = [p.id for p in personajes if p.mundo_id not in ids_mundos]
+    if huerfanos:
+        raise ValueError(f"Personajes con un mundo inexistente: {huerfanos}")
+
+    return CatalogoPersonajes(personajes, mundos, version=hashlib.sha256(contenido).hexdigest()[:16])
+
+
+def _firma_fichero(ruta: Path) -> (int, int):
+    estado = os.stat(ruta)
+    return estado.st_mtime_ns, estado.st_size
+
+
+_ruta_catalogo = Path(settings.CATALOG_PATH) if settings.CATALOG_PATH else RUTA_CATALOGO_POR_DEFECTO
+_firma_catalogo = _firma_fichero(_ruta_catalogo)
+_catalogo = cargar_catalogo(_ruta_catalogo)
+
+# Datos de la carga inicial, para scripts y pruebas; la aplicación lee siempre obtener_catalogo().
+DATOS_MUNDOS = dict(_catalogo.mundos)
+DATOS_PERSONAJES = list(_catalogo.personajes)
+
+
+def obtener_catalogo() -> CatalogoPersonajes:
+    """
+    Catálogo vigente. Una recarga sustituye la referencia de golpe, así que
+    quien ya lo haya obtenido sigue trabajando con una versión coherente.
+    """
+    return _catalogo
+
+
+def recargar_catalogo(forzar: bool = False) -> bool:
+    """
+    Vuelve a cargar el fichero si ha cambiado. Devuelve True si se publicó una nueva versión.
+    Lanza ValueError si el fichero quita ids del catálogo vigente: torneos, batallas y
+    repeticiones guardadas los siguen usando.
+    """
+    global _catalogo, _firma_catalogo
+
+    firma = _firma_fichero(_ruta_catalogo)
+    if firma == _firma_catalogo and not forzar:
+        return False
+
+    nuevo = cargar_catalogo(_ruta_catalogo)
+    retirados = sorted(_catalogo.por_id.keys() - nuevo.por_id.keys())
+    if retirados:
+        raise ValueError(f"El catálogo nuevo quita personajes en uso: {retirados}")
+    _firma_catalogo = firma
+    if nuevo.version == _catalogo.version:
+        return False
+
+    _catalogo = nuevo
+    logger.info(f"Catálogo recargado: versión {nuevo.version} con {len(nuevo)} personajes.")
+    return True
+
+
+async def vigilar_catalogo(intervalo_segundos: float = settings.CATALOG_RELOAD_INTERVAL_SECONDS):
+    """Comprueba periódicamente el fichero; si una recarga falla se mantiene el catálogo anterior."""
+    while True:
+        await asyncio.sleep(intervalo_segundos)
+        try:
+            await asyncio.to_thread(recargar_catalogo)
+        except Exception as e:
+            logger.error(f"No se pudo recargar el catálogo {_ruta_catalogo}: {e}")
 
 
 async def obtener_mundos_clon():
-    return list(DATOS_MUNDOS.values())
+    return list(obtener_catalogo().mundos.values())
 
 
 async def obtener_personajes_por_mundo(mundo_id: int):
-    personajes = [p for p in DATOS_PERSONAJES if p.mundo_id == mundo_id]
-    heroes = [p for p in personajes if p.tipo == "heroe"]
-    villanos = [p for p in personajes if p.tipo == "villano"]
-
-    return {
-        "heroes": heroes[:3],
-        "villanos": villanos[:3]
-    }
+    return obtener_catalogo().personajes_de_mundo(mundo_id)
 
 async def get_character_by_id(character_id: str) -> Personaje | None:
-    return next((p for p in DATOS_PERSONAJES if p.id == character_id), None)
+    return obtener_catalogo().obtener(character_id)
 
 async def get_all_characters() -> List[Personaje]:
-    return DATOS_PERSONAJES
\ No newline at end of file
+    return list(obtener_catalogo().personajes)
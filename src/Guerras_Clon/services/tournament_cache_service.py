@@ -0,0 +1,55 @@
+import hashlib
+from typing import NamedTuple
+from prometheus_client import Counter, Gauge
+from pydantic import TypeAdapter
+from src.Guerras_Clon.api.schemas.star_wars_models import TournamentSchema
+from src.Guerras_Clon.core.cache import CacheTTL
+from src.Guerras_Clon.core.config import settings
+
+CACHE_TORNEOS = Counter("guerras_clon_cache_torneos", "Consultas a la caché de detalles de torneo", ["resultado"])
+CACHE_TORNEOS_BYTES = Gauge("guerras_clon_cache_torneos_bytes", "Memoria ocupada por los detalles de torneo cacheados")
+
+_ADAPTADOR_TORNEO = TypeAdapter(TournamentSchema)
+
+
+class DetalleCacheado(NamedTuple):
+    cuerpo: bytes
+    etag: str
+    terminado: bool
+
+
+# Detalle de torneo ya serializado, por id. Un torneo terminado no cambia: se guarda
+# hasta que el LRU lo expulse por memoria o pasen TOURNAMENT_CACHE_COMPLETED_TTL_SECONDS,
+# que acota lo que otro worker puede servir un nombre de usuario cambiado. Los que están
+# en curso solo unos segundos; el worker que los modifica descarta su copia al momento.
+_detalles = CacheTTL(settings.TOURNAMENT_CACHE_MAX_ENTRIES, settings.TOURNAMENT_CACHE_COMPLETED_TTL_SECONDS,
+                     max_bytes=settings.TOURNAMENT_CACHE_MAX_BYTES, tamaño=lambda d: len(d.cuerpo))
+
+
+def obtener(tournament_id: int) -> DetalleCacheado | None:
+    detalle = _detalles.get(tournament_id, contar=False)
+    CACHE_TORNEOS.labels(resultado="fallo" if detalle is None else "acierto").inc()
+    return detalle
+
+
+def guardar(torneo: TournamentSchema) -> DetalleCacheado:
+    """Serializa el detalle, lo cachea según su estado y lo devuelve con su ETag."""
+    cuerpo = _ADAPTADOR_TORNEO.dump_json(torneo)
+    terminado = torneo.status == "completed"
+    detalle = DetalleCacheado(cuerpo, f'"{hashlib.sha256(cuerpo).hexdigest()[:16]}"', terminado)
+    ttl = None if terminado else settings.TOURNAMENT_CACHE_ACTIVE_TTL_SECONDS
+    if ttl is None or ttl > 0:
+        _detalles.set(torneo.id, detalle, ttl=ttl)
+    CACHE_TORNEOS_BYTES.set(_detalles.bytes)
+    return detalle
+
+
+def invalidar(tournament_id: int):
+    _detalles.pop(tournament_id)
+    CACHE_TORNEOS_BYTES.set(_detalles.bytes)
+
+
+def vaciar():
+    """Descarta todo; llamar cuando cambian datos de usuario incluidos en los detalles."""
+    _detalles.clear()
+    CACHE_TORNEOS_BYTES.set(0)
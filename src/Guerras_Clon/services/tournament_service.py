@@ -0,0 +1,86 @@
+import random
+from typing import Callable, List
+from src.Guerras_Clon.api.schemas.star_wars_models import Personaje
+
+MAX_PARTICIPANTS = 16
+AI_PARTICIPANTS_COUNT = 15
+TOTAL_ROUNDS = 4
+
+
+def sembrar_participantes(personaje_jugador: Personaje, todos: List[Personaje],
+                          rng: random.Random = random) -> List[Personaje]:
+    """
+    Elige 15 bots distintos del personaje del jugador y devuelve los 16
+    personajes barajados: el partido i de la primera ronda enfrenta a las
+    posiciones 2i y 2i+1.
+    """
+    disponibles = [c for c in todos if c.id != personaje_jugador.id]
+    if len(disponibles) < AI_PARTICIPANTS_COUNT:
+        raise ValueError("No hay suficientes personajes únicos para los bots.")
+
+    participantes = [personaje_jugador] + rng.sample(disponibles, AI_PARTICIPANTS_COUNT)
+    rng.shuffle(participantes)
+    return participantes
+
+
+def resolver_bracket(participantes: List[Personaje],
+                     ganador_de: Callable[[Personaje, Personaje], Personaje]) -> List[List[Personaje]]:
+    """
+    Juega un cuadro completo sin base de datos. Devuelve los ganadores de cada
+    ronda; el último elemento contiene solo al campeón.
+    """
+    rondas = []
+    vivos = participantes
+    while len(vivos) > 1:
+        vivos = [ganador_de(vivos[i * 2], vivos[i * 2 + 1]) for i in range(len(vivos) // 2)]
+        rondas.append(vivos)
+    return rondas
+
+
+def compactar_bracket(participantes, partidos) -> dict:
+    """
+    Cuadro en una sola estructura JSON para guardarlo en la fila del torneo.
+    "participantes" va en orden de siembra (el hueco h juega el partido h // 2
+    de la primera ronda) con [id, personaje, usuario, nombre de IA]; "rondas"
+    guarda, por ronda y en orden de match_index, [id del partido, hueco del
+    ganador o None]. Los jugadores de cada partido se deducen de la ronda anterior.
+    Acepta modelos ORM u objetos con los mismos atributos.
+    """
+    por_id = {p.id: p for p in participantes}
+    primera_ronda = sorted((m for m in partidos if m.round == 1), key=lambda m: m.match_index)
+    orden = [por_id[p_id] for m in primera_ronda for p_id in (m.player1_id, m.player2_id)]
+    hueco = {p.id: i for i, p in enumerate(orden)}
+
+    rondas = [[] for _ in range(TOTAL_ROUNDS)]
+    for m in sorted(partidos, key=lambda m: (m.round, m.match_index)):
+        rondas[m.round - 1].append([m.id, hueco.get(m.winner_id)])
+
+    return {
+        "participantes": [[p.id, p.character_id, p.user_id, p.ai_name] for p in orden],
+        "rondas": [ronda for ronda in rondas if ronda],
+    }
+
+
+def expandir_bracket(bracket: dict) -> tuple[List[dict], List[dict]]:
+    """Inversa de compactar_bracket: participantes y partidos como diccionarios."""
+    participantes = [
+        {"id": p_id, "character_id": character_id, "user_id": user_id, "ai_name": ai_name}
+        for p_id, character_id, user_id, ai_name in bracket["participantes"]
+    ]
+    partidos = []
+    huecos = list(range(len(participantes)))
+    for ronda, filas in enumerate(bracket["rondas"], start=1):
+        ganadores = []
+        for i, (match_id, ganador) in enumerate(filas):
+            partidos.append({
+                "id": match_id,
+                "round": ronda,
+                "match_index": i,
+                "player1_id": participantes[huecos[i * 2]]["id"],
+                "player2_id": participantes[huecos[i * 2 + 1]]["id"],
+                "winner_id": None if ganador is None else participantes[ganador]["id"],
+                "status": "pending" if ganador is None else "completed",
+            })
+            ganadores.append(ganador)
+        huecos = ganadores
+    return participantes, partidos
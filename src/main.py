@@ -1,16 +1,20 @@
 import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.future import select
 from sqlalchemy import delete
 from prometheus_fastapi_instrumentator import Instrumentator
 from src.Guerras_Clon.api.endpoints import star_wars, auth, admin, tournaments
-from src.Guerras_Clon.bd.database import SessionLocal, engine, Base
+from src.Guerras_Clon.bd.database import SessionLocal, engine, enrutador, Base, crear_columnas_pendientes, crear_indices_pendientes
+from src.Guerras_Clon.bd import instrumentacion
 from src.Guerras_Clon.bd.models import VerificationCode
 from src.Guerras_Clon.core.loggin_config import LOGGING_CONFIG
+from src.Guerras_Clon.core.config import settings
+from src.Guerras_Clon.security.auditing import escritor_auditoria, purgar_auditoria_antigua
+from src.Guerras_Clon.services import leaderboard_service, matchup_service, stats_service, swapi_service
 
 logging.config.dictConfig(LOGGING_CONFIG)
 logger = logging.getLogger("Guerras_Clon")
@@ -33,17 +37,46 @@ async def cleanup_expired_codes():
                 await db.rollback()
 
 
+async def purge_old_audit_logs():
+    logger.info(f"Iniciando retención de auditoría ({settings.AUDIT_RETENTION_DAYS} días)...")
+    while True:
+        limite = datetime.now(timezone.utc) - timedelta(days=settings.AUDIT_RETENTION_DAYS)
+        async with SessionLocal() as db:
+            try:
+                borrados = await purgar_auditoria_antigua(db, limite)
+                if borrados > 0:
+                    logger.info(f"Eliminados {borrados} registros de auditoría anteriores a {limite:%Y-%m-%d}.")
+            except Exception as e:
+                logger.error(f"Error durante la retención de auditoría: {e}")
+                await db.rollback()
+        await asyncio.sleep(3600)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Creando tablas en la base de datos...")
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(crear_columnas_pendientes)
+        await conn.run_sync(crear_indices_pendientes)
+    async with SessionLocal() as db:
+        await stats_service.inicializar(db)
+        await leaderboard_service.rellenar_duraciones(db)
 
     asyncio.create_task(cleanup_expired_codes())
+    if settings.AUDIT_RETENTION_DAYS > 0:
+        asyncio.create_task(purge_old_audit_logs())
+    if settings.AUDIT_MODE == "async":
+        escritor_auditoria.iniciar()
+    asyncio.create_task(matchup_service.obtener_matriz_matchups())
+    if settings.CATALOG_RELOAD_INTERVAL_SECONDS > 0:
+        asyncio.create_task(swapi_service.vigilar_catalogo())
 
     yield
 
     logger.info("Cerrando la aplicación.")
+    await escritor_auditoria.detener()
+    await enrutador.cerrar()
 
 
 app = FastAPI(
@@ -61,8 +94,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+
+@app.middleware("http")
+async def medir_consultas_bd(request: Request, call_next):
+    """Cuenta sentencias, filas y tiempo de BD de cada petición (métricas y cabecera Server-Timing)."""
+    with instrumentacion.medir_consultas() as medicion:
+        response = await call_next(request)
+    response.headers["Server-Timing"] = medicion.server_timing()
+    ruta = request.scope.get("route")
+    if ruta is not None:
+        instrumentacion.registrar_peticion(ruta.path, medicion)
+    return response
+
 app.include_router(auth.router, prefix="/api/auth", tags=["Autenticación"])
 app.include_router(admin.router, prefix="/api/admin", tags=["Administración"])
 app.include_router(star_wars.router, prefix="/api/guerras-clon", tags=["Juego"])
@@ -0,0 +1,235 @@
+import argparse
+import asyncio
+import random
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.Guerras_Clon.api.endpoints import auth, tournaments
+from src.Guerras_Clon.bd import models
+from src.Guerras_Clon.bd.database import Base, get_db, get_read_db
+from src.Guerras_Clon.security import security
+from src.Guerras_Clon.services import leaderboard_service, swapi_service, tournament_service
+
+PARTICIPANTES = tournament_service.MAX_PARTICIPANTS
+
+# Tablas recorridas enteras según el plan de cada motor.
+_ESCANEO_SQLITE = re.compile(r"^SCAN (\w+)")
+_ESCANEO_POSTGRES = re.compile(r"Seq Scan on (\w+)")
+
+
+async def sembrar(engine: AsyncEngine, n_torneos: int, n_usuarios: int, semilla: int = 0) -> dict:
+    """
+    Llena la BD con un volumen parecido al de producción: un 90 % de torneos
+    terminados, un 5 % en curso (primera ronda a medias) y un 5 % pendientes,
+    usuarios y códigos de verificación. Devuelve ids útiles para las consultas.
+    """
+    rng = random.Random(semilla)
+    personajes = [p.id for p in swapi_service.obtener_catalogo().personajes]
+    ahora = datetime.now(timezone.utc)
+
+    usuarios = [
+        {"id": i, "username": f"usuario{i}", "email": f"usuario{i}@example.com",
+         "hashed_password": "x", "role": "jugador"}
+        for i in range(1, n_usuarios + 1)
+    ]
+    codigos = [
+        {"email": f"nuevo{i}@example.com", "username": f"nuevo{i}", "hashed_password": "x",
+         "code": f"{rng.randrange(10 ** 6):06d}", "expires_at": ahora + timedelta(minutes=rng.randrange(-60, 20))}
+        for i in range(n_usuarios)
+    ]
+    torneos, participantes, partidos = [], [], []
+    activos, id_participante, id_partido = [], 0, 0
+
+    for t_id in range(1, n_torneos + 1):
+        estado = rng.choices(["completed", "active", "pending"], weights=[90, 5, 5])[0]
+        inicio = ahora - timedelta(days=rng.uniform(0, 60))
+        torneo = {"id": t_id, "name": f"Torneo {t_id}", "status": estado, "start_time": None}
+        torneos.append(torneo)
+        if estado == "pending":
+            continue
+
+        torneo["start_time"] = inicio
+        humano = rng.randrange(1, n_usuarios + 1)
+        ids = list(range(id_participante + 1, id_participante + PARTICIPANTES + 1))
+        id_participante += PARTICIPANTES
+        participantes.extend(
+            {"id": p_id, "tournament_id": t_id, "character_id": rng.choice(personajes),
+             "user_id": humano if i == 0 else None, "ai_name": None if i == 0 else f"IA {p_id}"}
+            for i, p_id in enumerate(ids)
+        )
+
+        partidos_torneo = []
+        ronda, jugadores = 1, ids
+        while len(jugadores) > 1:
+            ganadores = []
+            for i in range(len(jugadores) // 2):
+                id_partido += 1
+                jugado = estado == "completed" or i % 2 == 0
+                ganador = rng.choice(jugadores[i * 2:i * 2 + 2]) if jugado else None
+                partidos_torneo.append({
+                    "id": id_partido, "tournament_id": t_id, "round": ronda, "match_index": i,
+                    "player1_id": jugadores[i * 2], "player2_id": jugadores[i * 2 + 1],
+                    "winner_id": ganador, "status": "completed" if jugado else "pending",
+                    "seed": rng.getrandbits(63) if jugado else None
+                })
+                if estado == "active" and not jugado:
+                    activos.append(id_partido)
+                ganadores.append(ganador)
+            if estado == "active":
+                break
+            ronda, jugadores = ronda + 1, ganadores
+
+        partidos.extend(partidos_torneo)
+        torneo["bracket"] = tournament_service.compactar_bracket(
+            [SimpleNamespace(**p) for p in participantes[-PARTICIPANTES:]],
+            [SimpleNamespace(**m) for m in partidos_torneo]
+        )
+        if estado == "completed":
+            duracion = rng.uniform(30, 3600)
+            torneo.update(end_time=inicio + timedelta(seconds=duracion), duration_seconds=duracion,
+                          winner_id=humano if ganadores[0] == ids[0] else None)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(models.User), usuarios)
+        await conn.execute(insert(models.VerificationCode), codigos)
+        for estado in ("pending", "active", "completed"):
+            filas = [t for t in torneos if t["status"] == estado]
+            if filas:
+                await conn.execute(insert(models.Tournament), filas)
+        await conn.execute(insert(models.TournamentParticipant), participantes)
+        await conn.execute(insert(models.TournamentMatch), partidos)
+        await conn.execute(text("ANALYZE"))
+
+    completados = [t["id"] for t in torneos if t["status"] == "completed"]
+    return {
+        "usuario": SimpleNamespace(id=1, username="usuario1"),
+        "torneo": rng.choice(completados),
+        "partido_pendiente": rng.choice(activos) if activos else None,
+        "email": codigos[0]["email"],
+    }
+
+
+def _pasos(datos: dict) -> list[tuple[str, str, str, dict]]:
+    """Peticiones de las consultas críticas: (nombre, método, ruta, opciones de httpx)."""
+    pasos = [
+        ("torneos_abiertos", "GET", "/api/tournament/open", {}),
+        ("detalle_torneo", "GET", f"/api/tournament/{datos['torneo']}", {}),
+        ("leaderboard", "GET", "/api/tournament/leaderboard", {"params": {"window": "all"}}),
+        ("leaderboard_semana", "GET", "/api/tournament/leaderboard", {"params": {"window": "week"}}),
+        ("verificar_registro", "POST", "/api/auth/register/verify",
+         {"json": {"email": datos["email"], "code": "no-existe"}}),
+    ]
+    if datos["partido_pendiente"]:
+        pasos.append(("simular_partido", "POST", f"/api/tournament/match/{datos['partido_pendiente']}/simulate", {}))
+    return pasos
+
+
+async def explicar(engine: AsyncEngine, sentencia: str, parametros) -> list[str]:
+    prefijo = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    async with engine.connect() as conn:
+        result = await conn.exec_driver_sql(prefijo + sentencia, parametros)
+        filas = result.all()
+        await conn.rollback()
+    return [fila[-1] for fila in filas]
+
+
+def escaneos_secuenciales(dialecto: str, plan: list[str]) -> list[str]:
+    patron = _ESCANEO_SQLITE if dialecto == "sqlite" else _ESCANEO_POSTGRES
+    return [m.group(1) for linea in plan if (m := patron.search(linea.strip()))]
+
+
+async def capturar_planes(engine: AsyncEngine, datos: dict) -> list[dict]:
+    """
+    Ejecuta cada consulta crítica a través de su endpoint real, captura las
+    sentencias SELECT/UPDATE/DELETE que genera y devuelve su plan de ejecución
+    con las tablas que el motor recorre enteras.
+    """
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession)
+
+    async def get_db_planes():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(tournaments.router, prefix="/api/tournament")
+    app.include_router(auth.router, prefix="/api/auth")
+    app.dependency_overrides[get_db] = get_db_planes
+    app.dependency_overrides[get_read_db] = get_db_planes
+    app.dependency_overrides[security.get_current_user] = lambda: datos["usuario"]
+
+    capturadas = []
+
+    def _capturar(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and not statement.lstrip().upper().startswith("INSERT"):
+            capturadas.append((statement, parameters))
+
+    informe = []
+    event.listen(engine.sync_engine, "before_cursor_execute", _capturar)
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://planes") as cliente:
+            for nombre, metodo, ruta, opciones in _pasos(datos):
+                leaderboard_service.invalidar()
+                capturadas.clear()
+                response = await cliente.request(metodo, ruta, **opciones)
+                for sentencia, parametros in list(capturadas):
+                    plan = await explicar(engine, sentencia, parametros)
+                    informe.append({
+                        "consulta": nombre,
+                        "estado_http": response.status_code,
+                        "sql": sentencia,
+                        "plan": plan,
+                        "escaneos": escaneos_secuenciales(engine.dialect.name, plan),
+                    })
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _capturar)
+    return informe
+
+
+def imprimir_informe(informe: list[dict]):
+    for entrada in informe:
+        marca = "ESCANEO " + ", ".join(entrada["escaneos"]) if entrada["escaneos"] else "ok"
+        print(f"[{entrada['consulta']}] HTTP {entrada['estado_http']} — {marca}")
+        print("    " + " ".join(entrada["sql"].split())[:300])
+        for linea in entrada["plan"]:
+            print(f"      {linea}")
+
+
+async def _ejecutar(url: str, n_torneos: int, n_usuarios: int, semilla: int) -> list[dict]:
+    engine = create_async_engine(url)
+    try:
+        datos = await sembrar(engine, n_torneos, n_usuarios, semilla)
+        return await capturar_planes(engine, datos)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Siembra datos y comprueba con EXPLAIN que las consultas críticas usan índices.")
+    parser.add_argument("--url", help="BD vacía donde sembrar (p. ej. postgresql+asyncpg://...). "
+                                      "Por defecto, un SQLite temporal.")
+    parser.add_argument("--torneos", type=int, default=5000)
+    parser.add_argument("--usuarios", type=int, default=2000)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        url = args.url or f"sqlite+aiosqlite:///{Path(directorio) / 'planes.db'}"
+        informe = asyncio.run(_ejecutar(url, args.torneos, args.usuarios, args.semilla))
+
+    imprimir_informe(informe)
+    if any(entrada["escaneos"] for entrada in informe):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
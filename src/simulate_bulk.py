@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from src.Guerras_Clon.services import battle_service, solver_service, swapi_service, tournament_service
+
+COMBATES_POR_TORNEO = tournament_service.MAX_PARTICIPANTS - 1
+
+
+def _simular_lote(n_torneos: int, semilla: int, motor: str) -> dict:
+    """
+    Juega n_torneos cuadros completos con el mismo sembrado que join_and_start_tournament.
+    Con el motor "exacto" cada combate se decide con su probabilidad exacta de
+    victoria; con "turnos" se simula turno a turno con simular_batalla.
+    """
+    rng = random.Random(semilla)
+    random.seed(semilla)
+    personajes = swapi_service.obtener_catalogo().personajes
+
+    if motor == "exacto":
+        def ganador_de(p1, p2):
+            return p1 if rng.random() < solver_service.probabilidad_victoria_exacta(p1, p2) else p2
+    else:
+        def ganador_de(p1, p2):
+            return battle_service.simular_batalla(p1, p2)[0]
+
+    participaciones = Counter()
+    # rondas_ganadas[id][r]: veces que el personaje ganó exactamente r rondas (TOTAL_ROUNDS = campeón).
+    rondas_ganadas = {p.id: [0] * (tournament_service.TOTAL_ROUNDS + 1) for p in personajes}
+
+    for _ in range(n_torneos):
+        participantes = tournament_service.sembrar_participantes(rng.choice(personajes), personajes, rng)
+        victorias = Counter(p.id for ronda in tournament_service.resolver_bracket(participantes, ganador_de)
+                            for p in ronda)
+        for p in participantes:
+            participaciones[p.id] += 1
+            rondas_ganadas[p.id][victorias[p.id]] += 1
+
+    return {"participaciones": participaciones, "rondas_ganadas": rondas_ganadas}
+
+
+def simular_en_paralelo(total: int, lote: int, workers: int, motor: str, semilla: int) -> dict:
+    tamaños = [lote] * (total // lote) + ([total % lote] if total % lote else [])
+    semillas = [semilla + i for i in range(len(tamaños))]
+
+    participaciones = Counter()
+    rondas_ganadas = {}
+
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for resultado in executor.map(_simular_lote, tamaños, semillas, [motor] * len(tamaños)):
+            participaciones.update(resultado["participaciones"])
+            for character_id, rondas in resultado["rondas_ganadas"].items():
+                acumuladas = rondas_ganadas.setdefault(character_id, [0] * len(rondas))
+                for r, veces in enumerate(rondas):
+                    acumuladas[r] += veces
+    segundos = time.perf_counter() - inicio
+
+    return {
+        "torneos": total,
+        "segundos": segundos,
+        "torneos_por_segundo": total / segundos if segundos else 0.0,
+        "combates_por_segundo": total * COMBATES_POR_TORNEO / segundos if segundos else 0.0,
+        "personajes": {
+            character_id: {
+                "participaciones": participaciones[character_id],
+                "tasa_campeon": rondas[-1] / participaciones[character_id],
+                "rondas_ganadas": [veces / participaciones[character_id] for veces in rondas],
+            }
+            for character_id, rondas in rondas_ganadas.items()
+            if participaciones[character_id]
+        },
+    }
+
+
+def imprimir_informe(informe: dict):
+    print(f"Torneos simulados: {informe['torneos']} en {informe['segundos']:.2f}s "
+          f"({informe['torneos_por_segundo']:.0f} torneos/s, {informe['combates_por_segundo']:.0f} combates/s)")
+    print()
+    cabecera = " ".join(f"{f'{r} rondas':>9}" for r in range(tournament_service.TOTAL_ROUNDS + 1))
+    print(f"{'Personaje':<12} {'Torneos':>9} {'Campeón':>9} {cabecera}")
+
+    ordenados = sorted(informe["personajes"].items(), key=lambda item: item[1]["tasa_campeon"], reverse=True)
+    for character_id, datos in ordenados:
+        rondas = " ".join(f"{p:>9.1%}" for p in datos["rondas_ganadas"])
+        print(f"{character_id:<12} {datos['participaciones']:>9} {datos['tasa_campeon']:>9.1%} {rondas}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación masiva de torneos para análisis de balance.")
+    parser.add_argument("--torneos", type=int, default=100000, help="Número de torneos de 16 participantes.")
+    parser.add_argument("--lote", type=int, default=5000, help="Torneos por tarea enviada a cada proceso.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Procesos en paralelo.")
+    parser.add_argument("--motor", choices=["exacto", "turnos"], default="exacto")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--json", dest="salida_json", help="Guarda el informe completo en este fichero.")
+    args = parser.parse_args()
+
+    informe = simular_en_paralelo(args.torneos, args.lote, args.workers, args.motor, args.semilla)
+    imprimir_informe(informe)
+
+    if args.salida_json:
+        with open(args.salida_json, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
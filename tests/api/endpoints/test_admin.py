@@ -0,0 +1,102 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.Guerras_Clon.api.endpoints import admin
+from src.Guerras_Clon.bd import models
+from src.Guerras_Clon.bd.database import Base, get_db, get_read_db
+from src.Guerras_Clon.security import security
+from src.Guerras_Clon.security.auditing import purgar_auditoria_antigua
+from src.Guerras_Clon.services import stats_service
+
+INICIO = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'admin.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # 30 registros; cada dos comparten timestamp para probar el desempate por id.
+        await conn.execute(insert(models.AuditLog), [
+            {"timestamp": INICIO + timedelta(minutes=i // 2), "username": f"user{i % 3}",
+             "action": "USER_LOGIN" if i % 2 else "JOIN_TOURNAMENT", "details": str(i)}
+            for i in range(30)
+        ])
+    yield sessionmaker(bind=engine, class_=AsyncSession)
+    await engine.dispose()
+
+
+@pytest.fixture
+async def cliente(session_factory):
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/admin")
+
+    async def get_db_prueba():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = get_db_prueba
+    app.dependency_overrides[get_read_db] = get_db_prueba
+    app.dependency_overrides[security.get_current_admin_user] = lambda: None
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+async def _todas_las_paginas(cliente, **params):
+    ids, cursor = [], None
+    while True:
+        respuesta = await cliente.get("/api/admin/logs", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert respuesta.status_code == 200
+        ids += [log["id"] for log in respuesta.json()]
+        cursor = respuesta.headers.get("x-next-cursor")
+        if not cursor:
+            return ids
+
+
+async def test_logs_paginacion_por_cursor(cliente):
+    """Recorrer las páginas devuelve todos los registros una vez, del más reciente al más antiguo."""
+    ids = await _todas_las_paginas(cliente, limit=7)
+
+    assert ids == list(range(30, 0, -1))
+
+
+async def test_logs_filtros(cliente):
+    """Los filtros por usuario, acción y rango de fechas se combinan con el cursor."""
+    ids = await _todas_las_paginas(cliente, limit=2, username="user1", action="USER_LOGIN",
+                                   desde=(INICIO + timedelta(minutes=3)).isoformat())
+
+    # details == id - 1: user1 son los i con i % 3 == 1, USER_LOGIN los impares, desde el minuto 3 i >= 6.
+    assert ids == [i + 1 for i in range(29, 5, -1) if i % 3 == 1 and i % 2]
+
+
+async def test_logs_cursor_invalido(cliente):
+    """Un cursor manipulado da 400."""
+    respuesta = await cliente.get("/api/admin/logs", params={"cursor": "no-es-un-cursor"})
+
+    assert respuesta.status_code == 400
+
+
+async def test_purgar_auditoria_antigua(session_factory):
+    """La retención borra por lotes solo los registros anteriores al límite."""
+    async with session_factory() as db:
+        borrados = await purgar_auditoria_antigua(db, INICIO + timedelta(minutes=10), lote=4)
+
+    assert borrados == 20
+
+
+async def test_stats_y_actividad(cliente, session_factory):
+    """/stats lee los contadores y /activity la agregación por hora, reconstruidos al arrancar."""
+    async with session_factory() as db:
+        await stats_service.inicializar(db)
+
+    stats = (await cliente.get("/api/admin/stats")).json()
+    assert (stats["total_users"], stats["total_audit_logs"]) == (0, 30)
+
+    actividad = (await cliente.get("/api/admin/activity", params={
+        "desde": INICIO.isoformat(), "hasta": (INICIO + timedelta(hours=1)).isoformat(), "action": "USER_LOGIN"
+    })).json()
+    assert [(a["action"], a["count"]) for a in actividad] == [("USER_LOGIN", 15)]
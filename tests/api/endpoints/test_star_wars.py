@@ -0,0 +1,51 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from src.Guerras_Clon.api.endpoints import star_wars
+from src.Guerras_Clon.security import security
+from src.Guerras_Clon.services import swapi_service
+
+
+@pytest.fixture
+async def cliente():
+    app = FastAPI()
+    app.include_router(star_wars.router, prefix="/api/guerras-clon")
+    app.dependency_overrides[security.get_token_data] = lambda: security.TokenData(username="yoda", role="jugador")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+async def test_mundos_etag_y_304(cliente):
+    """La lista de mundos lleva ETag de la versión del catálogo y responde 304 si no ha cambiado."""
+    respuesta = await cliente.get("/api/guerras-clon/mundos")
+
+    assert respuesta.status_code == 200
+    assert respuesta.json() == [m.model_dump(mode="json") for m in swapi_service.DATOS_MUNDOS.values()]
+    assert respuesta.headers["etag"] == f'"{swapi_service.obtener_catalogo().version}"'
+    assert respuesta.headers["cache-control"] == star_wars.CACHE_CONTROL_CATALOGO
+
+    revalidacion = await cliente.get("/api/guerras-clon/mundos", headers={"If-None-Match": respuesta.headers["etag"]})
+    assert revalidacion.status_code == 304
+    assert revalidacion.content == b""
+
+
+async def test_personajes_de_mundo_cacheados(cliente):
+    """El JSON de cada mundo se serializa una vez y coincide con la selección del catálogo."""
+    catalogo = swapi_service.obtener_catalogo()
+    respuesta = await cliente.get("/api/guerras-clon/mundos/2/personajes")
+
+    assert respuesta.status_code == 200
+    assert respuesta.json()["heroes"][0]["nombre"] == "Princess Leia (Hoth)"
+    assert respuesta.content == catalogo.json_personajes_de_mundo(2)
+    assert catalogo.json_personajes_de_mundo(2) is catalogo.json_personajes_de_mundo(2)
+
+    etag = respuesta.headers["etag"]
+    assert (await cliente.get("/api/guerras-clon/mundos/2/personajes", headers={"If-None-Match": etag})).status_code == 304
+    assert (await cliente.get("/api/guerras-clon/mundos/1/personajes", headers={"If-None-Match": etag})).status_code == 200
+
+
+async def test_personajes_de_mundo_inexistente(cliente):
+    """Un mundo sin personajes sigue devolviendo 404."""
+    respuesta = await cliente.get("/api/guerras-clon/mundos/99/personajes")
+
+    assert respuesta.status_code == 404
@@ -0,0 +1,241 @@
+from types import SimpleNamespace
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.Guerras_Clon.bd import models
+from src.Guerras_Clon.bd.database import Base, get_db, get_read_db
+from src.Guerras_Clon.security import security
+from src.Guerras_Clon.services import swapi_service, tournament_cache_service, tournament_service
+from src.Guerras_Clon.api.endpoints import tournaments
+from src.Guerras_Clon.api.endpoints.tournaments import _resolver_rondas_pendientes, TOTAL_ROUNDS
+
+
+@pytest.fixture
+def torneo_activo():
+    """Un torneo recién empezado: 16 participantes (el 1 es humano) y la primera ronda pendiente."""
+    personajes = swapi_service.DATOS_PERSONAJES[:16]
+    torneo = models.Tournament(id=1, name="Torneo", status="active")
+    torneo.participants = [
+        models.TournamentParticipant(
+            id=i + 1, tournament_id=1, character_id=p.id,
+            user_id=10 if i == 0 else None, ai_name=None if i == 0 else f"IA: {p.nombre}"
+        )
+        for i, p in enumerate(personajes)
+    ]
+    torneo.matches = [
+        models.TournamentMatch(
+            id=i + 1, tournament_id=1, round=1, match_index=i,
+            player1_id=i * 2 + 1, player2_id=i * 2 + 2, status="pending"
+        )
+        for i in range(8)
+    ]
+    return torneo
+
+
+@pytest.fixture
+def character_map():
+    return {p.id: p for p in swapi_service.DATOS_PERSONAJES}
+
+
+def test_resolver_rondas_hasta_el_final(torneo_activo, character_map):
+    """Sin detenerse, se juegan las 4 rondas y hay un ganador."""
+    nuevos, ganador = _resolver_rondas_pendientes(torneo_activo, character_map)
+
+    assert all(m.status == "completed" for m in torneo_activo.matches)
+    assert [m.round for m in nuevos] == [2, 2, 2, 2, 3, 3, 4]
+    assert all(m.status == "completed" and m.winner_id for m in nuevos)
+    assert all(m.seed is not None for m in torneo_activo.matches + nuevos)
+    assert ganador.id == nuevos[-1].winner_id
+    assert nuevos[-1].round == TOTAL_ROUNDS
+
+
+def test_resolver_rondas_se_detiene_en_el_jugador(torneo_activo, character_map):
+    """Con stop_at_player, el partido del humano queda pendiente y la ronda no avanza."""
+    nuevos, ganador = _resolver_rondas_pendientes(torneo_activo, character_map, stop_at_player=True)
+
+    partido_humano = torneo_activo.matches[0]
+    assert partido_humano.status == "pending"
+    assert all(m.status == "completed" for m in torneo_activo.matches[1:])
+    assert nuevos == []
+    assert ganador is None
+
+
+@pytest.fixture
+async def sesiones(tmp_path):
+    """SQLite con un torneo recién empezado (id 1): 16 participantes y la primera ronda pendiente; el 2, abierto."""
+    participantes = [
+        {"id": i + 1, "tournament_id": 1, "character_id": p.id,
+         "user_id": 10 if i == 0 else None, "ai_name": None if i == 0 else f"IA: {p.nombre}"}
+        for i, p in enumerate(swapi_service.DATOS_PERSONAJES[:16])
+    ]
+    partidos = [
+        {"id": i + 1, "tournament_id": 1, "round": 1, "match_index": i,
+         "player1_id": i * 2 + 1, "player2_id": i * 2 + 2, "winner_id": None, "status": "pending"}
+        for i in range(8)
+    ]
+    bracket = tournament_service.compactar_bracket([SimpleNamespace(**p) for p in participantes],
+                                                   [SimpleNamespace(**m) for m in partidos])
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'torneos.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(models.User).values(id=10, username="yoda", email="yoda@example.com",
+                                                      hashed_password="x", role="jugador"))
+        await conn.execute(insert(models.Tournament).values(id=1, name="Torneo", status="active", bracket=bracket))
+        await conn.execute(insert(models.Tournament).values(id=2, name="Abierto", status="pending"))
+        await conn.execute(insert(models.TournamentParticipant), participantes)
+        await conn.execute(insert(models.TournamentMatch), partidos)
+    yield sessionmaker(bind=engine, class_=AsyncSession)
+    await engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def cache_torneos_vacia():
+    """Cada prueba empieza sin detalles cacheados: todas usan el torneo 1."""
+    tournament_cache_service.vaciar()
+    yield
+    tournament_cache_service.vaciar()
+
+
+@pytest.fixture
+async def cliente(sesiones):
+    """API de torneos sobre la BD de `sesiones`, con el usuario 10 autenticado."""
+    async def get_db_prueba():
+        async with sesiones() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(tournaments.router, prefix="/api/tournament")
+    app.dependency_overrides[get_db] = get_db_prueba
+    app.dependency_overrides[get_read_db] = get_db_prueba
+    app.dependency_overrides[security.get_current_user] = lambda: security.UserResponse(
+        id=10, username="yoda", role="jugador", email="yoda@example.com", must_change_password=False)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+async def test_presupuesto_detalle_torneo(cliente, presupuesto_consultas):
+    """El detalle se lee de la fila del torneo (columna bracket) más la del jugador humano."""
+    with presupuesto_consultas(consultas=2, filas=2):
+        response = await cliente.get("/api/tournament/1")
+    assert response.status_code == 200
+    assert len(response.json()["matches"]) == 8
+
+
+async def test_presupuesto_simular_partido(cliente, presupuesto_consultas):
+    """Simular un partido bloquea el torneo y carga el partido, su torneo y los jugadores sin consultas por fila."""
+    with presupuesto_consultas(consultas=8, filas=60):
+        response = await cliente.post("/api/tournament/match/2/simulate")
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+
+
+def test_simular_partido_bloquea_el_torneo():
+    """En PostgreSQL la fila del torneo se lee con FOR UPDATE antes de reescribir el bracket."""
+    sql = str(tournaments._bloqueo_torneo_del_partido(2).compile(dialect=postgresql.dialect()))
+    assert "FROM tournaments" in sql and sql.rstrip().endswith("FOR UPDATE")
+
+
+async def test_detalle_cacheado_y_etag(cliente, presupuesto_consultas):
+    """La segunda lectura sale de la caché sin consultas; con su ETag responde 304."""
+    primera = await cliente.get("/api/tournament/1")
+    assert primera.headers["cache-control"] == tournaments.CACHE_CONTROL_TORNEO_EN_CURSO
+
+    with presupuesto_consultas(consultas=0):
+        segunda = await cliente.get("/api/tournament/1")
+        no_modificado = await cliente.get("/api/tournament/1", headers={"If-None-Match": primera.headers["etag"]})
+
+    assert segunda.content == primera.content
+    assert no_modificado.status_code == 304
+
+
+async def test_simular_partido_invalida_el_detalle(cliente):
+    """Tras simular un partido, el detalle refleja el resultado y cambia su ETag."""
+    antes = await cliente.get("/api/tournament/1")
+    assert (await cliente.post("/api/tournament/match/2/simulate")).status_code == 200
+
+    despues = await cliente.get("/api/tournament/1", headers={"If-None-Match": antes.headers["etag"]})
+    assert despues.status_code == 200
+    assert despues.headers["etag"] != antes.headers["etag"]
+    assert despues.json()["matches"][1]["status"] == "completed"
+
+
+async def test_presupuesto_unirse_a_torneo(cliente, sesiones, presupuesto_consultas):
+    """Unirse inserta participantes y primera ronda en un INSERT cada uno y responde sin releer."""
+    personaje = swapi_service.DATOS_PERSONAJES[0].id
+    # Torneo, auditoría (3), participantes, primera ronda y estado. SQLite no garantiza el orden
+    # de RETURNING en un INSERT multi-fila y SQLAlchemy lo parte en una sentencia por fila.
+    por_fila = 16 + 8 - 2 if sesiones.kw["bind"].dialect.name == "sqlite" else 0
+    with presupuesto_consultas(consultas=7 + por_fila):
+        response = await cliente.post("/api/tournament/2/join", json={"character_id": personaje})
+    assert response.status_code == 200
+    unido = response.json()
+
+    assert unido["status"] == "active"
+    assert len(unido["participants"]) == 16 and len(unido["matches"]) == 8
+    humano = next(p for p in unido["participants"] if p["user"])
+    assert humano["user"]["username"] == "yoda" and humano["character_id"] == personaje
+
+    # La respuesta montada en memoria es la misma que se lee después de la BD.
+    tournament_cache_service.vaciar()
+    releido = (await cliente.get("/api/tournament/2")).json()
+    assert releido == {**unido, "start_time": releido["start_time"]}
+    assert unido["start_time"].removesuffix("Z") == releido["start_time"].removesuffix("Z")
+
+
+async def test_repeticion_usa_las_stats_guardadas(cliente, monkeypatch):
+    """La repetición reproduce el partido aunque luego cambien las stats del catálogo."""
+    assert (await cliente.post("/api/tournament/match/2/simulate")).status_code == 200
+    original = (await cliente.get("/api/tournament/match/2/replay")).json()
+
+    catalogo = swapi_service.obtener_catalogo()
+    retocados = [p.model_copy(update={"info": p.info.model_copy(update={"defensa": p.info.defensa * 3})})
+                 for p in catalogo.personajes]
+    monkeypatch.setattr(swapi_service, "_catalogo",
+                        swapi_service.CatalogoPersonajes(retocados, catalogo.mundos.values(), version="retocado"))
+
+    assert (await cliente.get("/api/tournament/match/2/replay")).json() == original
+
+
+async def test_repeticion_no_reproducible(cliente, sesiones):
+    """Un partido sin stats guardadas cuyo resultado ya no se reproduce responde 409."""
+    assert (await cliente.post("/api/tournament/match/2/simulate")).status_code == 200
+    async with sesiones() as db:
+        partido = await db.get(models.TournamentMatch, 2)
+        perdedor = partido.player2_id if partido.winner_id == partido.player1_id else partido.player1_id
+        await db.execute(update(models.TournamentMatch).where(models.TournamentMatch.id == 2)
+                         .values(battle_stats=None, winner_id=perdedor))
+        await db.commit()
+
+    assert (await cliente.get("/api/tournament/match/2/replay")).status_code == 409
+
+
+@pytest.mark.parametrize("partido_a_partido", [False, True])
+async def test_detalle_compacto_coincide_con_el_relacional(cliente, sesiones, partido_a_partido):
+    """Tras jugar el torneo, el detalle leído del bracket es igual al reconstruido desde las tablas."""
+    if partido_a_partido:
+        while pendientes := [m for m in (await cliente.get("/api/tournament/1")).json()["matches"]
+                             if m["status"] == "pending"]:
+            assert (await cliente.post(f"/api/tournament/match/{pendientes[0]['id']}/simulate")).status_code == 200
+    else:
+        assert (await cliente.post("/api/tournament/1/simulate-all")).status_code == 200
+    compacto = (await cliente.get("/api/tournament/1")).json()
+
+    async with sesiones() as db:
+        await db.execute(update(models.Tournament).values(bracket=None))
+        await db.commit()
+    tournament_cache_service.vaciar()
+    relacional = (await cliente.get("/api/tournament/1")).json()
+
+    assert compacto["status"] == "completed"
+    assert len(compacto["matches"]) == 15
+    # SQLite no conserva la zona horaria; el detalle montado en memoria sí la lleva.
+    compacto["end_time"] = compacto["end_time"].removesuffix("Z")
+    relacional["end_time"] = relacional["end_time"].removesuffix("Z")
+    compacto["participants"].sort(key=lambda p: p["id"])
+    relacional["participants"].sort(key=lambda p: p["id"])
+    assert compacto == relacional
@@ -0,0 +1,97 @@
+from sqlalchemy import event, insert, inspect, select, text, update
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.Guerras_Clon.bd import instrumentacion, models
+from src.Guerras_Clon.bd.database import (Base, EnrutadorSesiones, crear_columnas_pendientes,
+                                          crear_indices_pendientes)
+
+
+async def test_actualizar_esquema_existente(tmp_path):
+    """Sobre una tabla antigua se añaden las columnas que admiten NULL y los índices que faltan."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'antigua.db'}")
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE tournaments (id INTEGER PRIMARY KEY, name VARCHAR, "
+                                "status VARCHAR, winner_id INTEGER, start_time DATETIME, end_time DATETIME)"))
+        await conn.run_sync(crear_columnas_pendientes)
+        await conn.run_sync(crear_indices_pendientes)
+
+        columnas = await conn.run_sync(lambda c: {col["name"] for col in inspect(c).get_columns("tournaments")})
+        indices = await conn.run_sync(lambda c: {i["name"] for i in inspect(c).get_indexes("tournaments")})
+    await engine.dispose()
+
+    assert "duration_seconds" in columnas
+    assert "ix_tournaments_status_duration" in indices
+
+
+async def _bd_con_torneo(ruta, nombre):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{ruta}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(models.Tournament).values(name=nombre, status="pending"))
+    return engine
+
+
+async def _nombres(session_factory):
+    async with session_factory() as db:
+        return (await db.execute(select(models.Tournament.name))).scalars().all()
+
+
+async def test_enrutador_lee_de_replicas_y_escribe_en_principal(tmp_path):
+    """Las lecturas se reparten por turnos entre las réplicas; la escritura va a la principal."""
+    principal = await _bd_con_torneo(tmp_path / "principal.db", "principal")
+    replica_a = await _bd_con_torneo(tmp_path / "replica_a.db", "replica_a")
+    replica_b = await _bd_con_torneo(tmp_path / "replica_b.db", "replica_b")
+    enrutador = EnrutadorSesiones(principal, [replica_a, replica_b])
+
+    assert await _nombres(enrutador.escritura) == ["principal"]
+    assert await _nombres(enrutador.sesion_lectura) == ["replica_a"]
+    assert await _nombres(enrutador.sesion_lectura) == ["replica_b"]
+    assert await _nombres(enrutador.sesion_lectura) == ["replica_a"]
+
+    await enrutador.cerrar()
+
+
+async def test_enrutador_sin_replicas_lee_de_principal(tmp_path):
+    """Sin réplicas configuradas, get_read_db usa la base de datos principal."""
+    principal = await _bd_con_torneo(tmp_path / "principal.db", "principal")
+    enrutador = EnrutadorSesiones(principal)
+
+    assert await _nombres(enrutador.sesion_lectura) == ["principal"]
+    await enrutador.cerrar()
+
+
+async def test_medir_consultas_cuenta_sentencias_y_filas(tmp_path):
+    """La medición cuenta solo lo ejecutado dentro del bloque, con las filas devueltas."""
+    principal = await _bd_con_torneo(tmp_path / "principal.db", "principal")
+    enrutador = EnrutadorSesiones(principal)
+    async with enrutador.escritura() as db:
+        await db.execute(insert(models.Tournament), [{"name": f"t{i}", "status": "pending"} for i in range(4)])
+        await db.commit()
+
+        with instrumentacion.medir_consultas() as medicion:
+            await db.execute(select(models.Tournament))
+            await db.execute(select(models.Tournament.id).limit(2))
+
+    assert medicion.sentencias == 2
+    assert medicion.filas == 7
+    assert medicion.server_timing().startswith("db;dur=")
+    await enrutador.cerrar()
+
+
+async def test_cursor_aiosqlite_trae_las_filas_al_ejecutar(tmp_path):
+    """
+    aiosqlite no da rowcount en los SELECT (-1): instrumentacion._filas cuenta entonces
+    el buffer `_rows` del cursor adaptado, que ya está lleno tras ejecutar.
+    """
+    engine = await _bd_con_torneo(tmp_path / "principal.db", "principal")
+    vistas = []
+
+    def _ver_cursor(conn, cursor, statement, parameters, context, executemany):
+        vistas.append((cursor.rowcount, len(cursor._rows), instrumentacion._filas(cursor)))
+
+    event.listen(engine.sync_engine, "after_cursor_execute", _ver_cursor)
+    async with engine.begin() as conn:
+        await conn.execute(select(models.Tournament))
+        await conn.execute(update(models.Tournament).values(status="active"))
+    await engine.dispose()
+
+    assert vistas == [(-1, 1, 1), (1, 0, 1)]
@@ -0,0 +1,21 @@
+from contextlib import contextmanager
+import pytest
+from src.Guerras_Clon.bd.instrumentacion import medir_consultas
+
+
+@pytest.fixture
+def presupuesto_consultas():
+    """
+    Falla si el bloque ejecuta más sentencias SQL (o devuelve más filas) de las previstas:
+        with presupuesto_consultas(consultas=3, filas=50): ...
+    """
+    @contextmanager
+    def _presupuesto(consultas: int, filas: int | None = None):
+        with medir_consultas() as medicion:
+            yield medicion
+        assert medicion.sentencias <= consultas, \
+            f"{medicion.sentencias} sentencias SQL; el presupuesto es {consultas}"
+        if filas is not None:
+            assert medicion.filas <= filas, f"{medicion.filas} filas; el presupuesto es {filas}"
+
+    return _presupuesto
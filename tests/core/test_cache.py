@@ -0,0 +1,83 @@
+from src.Guerras_Clon.core.cache import CacheTTL
+
+
+class RelojFalso:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+def test_expulsion_lru():
+    """Al superar la capacidad se expulsa la entrada usada hace más tiempo."""
+    expulsadas = []
+    cache = CacheTTL(2, al_expulsar=lambda clave, valor, motivo: expulsadas.append((clave, motivo)))
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert expulsadas == [("b", "capacidad")]
+
+
+def test_caducidad_por_inactividad():
+    """Con renovar_al_leer, cada lectura alarga la vida de la entrada."""
+    reloj = RelojFalso()
+    cache = CacheTTL(10, ttl_segundos=10, renovar_al_leer=True, reloj=reloj)
+    cache.set("a", 1)
+
+    reloj.ahora = 8
+    assert cache.get("a") == 1
+    reloj.ahora = 16
+    assert cache.get("a") == 1
+    reloj.ahora = 30
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_caducidad_absoluta_y_metricas():
+    """Sin renovar, la entrada caduca aunque se lea; se cuentan aciertos y fallos."""
+    reloj = RelojFalso()
+    cache = CacheTTL(10, ttl_segundos=10, reloj=reloj)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=100)
+
+    reloj.ahora = 8
+    assert cache.get("a") == 1
+    reloj.ahora = 12
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert (cache.aciertos, cache.fallos) == (2, 1)
+
+
+def test_expulsion_por_bytes():
+    """Con max_bytes se expulsan las entradas menos usadas hasta que el total cabe."""
+    cache = CacheTTL(10, max_bytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.get("a")
+    cache.set("c", b"1234")
+
+    assert "b" not in cache
+    assert cache.get("a") == b"1234" and cache.get("c") == b"1234"
+    assert cache.bytes == 8
+
+    cache.set("a", b"12")
+    assert cache.bytes == 6
+    cache.pop("c")
+    assert cache.bytes == 2
+
+
+def test_valor_mayor_que_max_bytes_no_se_guarda():
+    """Un valor que no cabe por sí solo se descarta sin expulsar lo ya guardado."""
+    cache = CacheTTL(10, max_bytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"x" * 11)
+
+    assert "b" not in cache
+    assert cache.get("a") == b"1234"
+    assert cache.bytes == 4
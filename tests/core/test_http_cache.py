@@ -0,0 +1,15 @@
+import pytest
+from src.Guerras_Clon.core.http_cache import etag_coincide
+
+
+@pytest.mark.parametrize("if_none_match, coincide", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"xyz", "abc"', True),
+    ("*", True),
+    ('"abcd"', False),
+])
+def test_etag_coincide(if_none_match, coincide):
+    """If-None-Match admite listas, comodín y ETags débiles."""
+    assert etag_coincide(if_none_match, '"abc"') == coincide
@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timezone
+import pytest
+from unittest.mock import AsyncMock
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.Guerras_Clon.bd import models
+from src.Guerras_Clon.bd.database import Base
+from src.Guerras_Clon.security import auditing
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'auditoria.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(bind=engine, class_=AsyncSession)
+    await engine.dispose()
+
+
+def _entrada(i):
+    return {"timestamp": datetime.now(timezone.utc), "username": f"user{i}", "action": "USER_LOGIN", "details": "Success"}
+
+
+async def test_escritor_inserta_por_lotes(session_factory):
+    """Todo lo encolado acaba en la tabla, en lotes de como mucho tamaño_lote."""
+    escritor = auditing.EscritorAuditoria(session_factory, tamaño_lote=100, intervalo_segundos=0.05)
+    escritor.iniciar()
+    for i in range(250):
+        await escritor.encolar(None, _entrada(i))
+    await escritor.detener()
+
+    async with session_factory() as db:
+        assert await db.scalar(select(func.count(models.AuditLog.id))) == 250
+    assert not escritor.activo
+
+
+async def test_escritor_escribe_por_intervalo(session_factory):
+    """Un lote incompleto se escribe al cumplirse el intervalo, sin esperar a llenarse."""
+    escritor = auditing.EscritorAuditoria(session_factory, tamaño_lote=100, intervalo_segundos=0.05)
+    escritor.iniciar()
+    await escritor.encolar(None, _entrada(1))
+    await asyncio.sleep(0.3)
+
+    async with session_factory() as db:
+        assert await db.scalar(select(func.count(models.AuditLog.id))) == 1
+    await escritor.detener()
+
+
+@pytest.mark.parametrize("politica, en_sesion", [("sync", 1), ("drop", 0)])
+async def test_escritor_cola_llena(politica, en_sesion, monkeypatch):
+    """Con la cola llena, "sync" escribe en la sesión de la petición y "drop" descarta."""
+    monkeypatch.setattr(auditing.stats_service, "registrar_eventos", AsyncMock())
+    escritor = auditing.EscritorAuditoria(max_cola=1, politica_desborde=politica)
+    añadidos = []
+    db = type("Sesion", (), {"add": lambda self, obj: añadidos.append(obj)})()
+
+    await escritor.encolar(db, _entrada(1))
+    await escritor.encolar(db, _entrada(2))
+
+    assert len(añadidos) == en_sesion
+
+
+async def test_audit_decorador_extrae_usuario_de_args(monkeypatch):
+    """El decorador encuentra db y current_user aunque lleguen por posición."""
+    monkeypatch.setattr(auditing.stats_service, "registrar_eventos", AsyncMock())
+    registros = []
+
+    class Sesion:
+        def add(self, obj):
+            registros.append(obj)
+
+    class Usuario:
+        username = "yoda"
+
+    @auditing.audit("ACCION")
+    async def endpoint(db, current_user):
+        return "ok"
+
+    assert await endpoint(Sesion(), Usuario()) == "ok"
+    assert (registros[0].username, registros[0].action, registros[0].details) == ("yoda", "ACCION", "SUCCESS")
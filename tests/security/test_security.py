@@ -0,0 +1,86 @@
+import pytest
+from datetime import timedelta
+from fastapi import HTTPException
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from src.Guerras_Clon.security import security
+
+
+@pytest.fixture(autouse=True)
+def caches_vacias():
+    security._tokens.clear()
+    security._usuarios.clear()
+    yield
+    security._tokens.clear()
+    security._usuarios.clear()
+
+
+def _usuario_bd(username="yoda", role="jugador"):
+    return SimpleNamespace(id=1, username=username, role=role, email="yoda@example.com", must_change_password=False)
+
+
+def _token(username="yoda", role="jugador"):
+    return security.create_access_token({"sub": username, "role": role}, timedelta(minutes=5))
+
+
+async def test_token_data_sin_base_de_datos():
+    """El rol se obtiene del token, y el segundo uso del mismo token no se vuelve a decodificar."""
+    token = _token(role="admin")
+
+    assert (await security.get_token_data(token)).role == "admin"
+    with patch.object(security.jwt, "decode", side_effect=AssertionError("no debería decodificar")):
+        assert (await security.get_token_data(token)).username == "yoda"
+
+
+async def test_token_invalido():
+    """Un token mal firmado da 401."""
+    with pytest.raises(HTTPException) as error:
+        await security.get_token_data("no-es-un-token")
+    assert error.value.status_code == 401
+
+
+async def test_usuario_cacheado_hasta_invalidar():
+    """El usuario solo se consulta en la base de datos la primera vez o tras invalidarlo."""
+    token_data = await security.get_token_data(_token())
+
+    with patch.object(security, "get_user", AsyncMock(return_value=_usuario_bd())) as get_user:
+        primero = await security.get_current_user(token_data, db=None)
+        segundo = await security.get_current_user(token_data, db=None)
+        assert get_user.await_count == 1
+        assert segundo is primero
+        assert isinstance(primero, security.UserResponse)
+
+        security.invalidar_usuario("yoda")
+        get_user.return_value = _usuario_bd(role="admin")
+        assert (await security.get_current_user(token_data, db=None)).role == "admin"
+        assert get_user.await_count == 2
+
+
+async def test_usuario_inexistente():
+    """Si el usuario del token ya no existe se responde 401 y no se cachea."""
+    token_data = await security.get_token_data(_token("fantasma"))
+
+    with patch.object(security, "get_user", AsyncMock(return_value=None)):
+        with pytest.raises(HTTPException) as error:
+            await security.get_current_user(token_data, db=None)
+    assert error.value.status_code == 401
+    assert "fantasma" not in security._usuarios
+
+
+async def test_hash_en_pool_no_bloquea():
+    """El hash se calcula fuera del event loop y se puede verificar después."""
+    hashed = await security.get_password_hash_async("Secreta123!")
+
+    assert await security.verify_password_async("Secreta123!", hashed)
+    assert not await security.verify_password_async("Otra123!", hashed)
+
+
+async def test_hash_cola_llena_responde_503(monkeypatch):
+    """Con la cola de bcrypt llena se responde 503 sin esperar."""
+    monkeypatch.setattr(security, "_hashes_en_curso",
+                        security.settings.PASSWORD_HASH_WORKERS + security.settings.PASSWORD_HASH_QUEUE_MAX)
+
+    with pytest.raises(HTTPException) as error:
+        await security.verify_password_async("x", "y")
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"] == "1"
@@ -2,6 +2,7 @@ import pytest
 import random
 from unittest.mock import patch, MagicMock
 from src.Guerras_Clon.api.schemas.star_wars_models import Personaje, InfoPersonaje
+from src.Guerras_Clon.services import battle_service
 from src.Guerras_Clon.services.battle_service import AtaqueNormal, AtaqueEspecial, HabilidadFactory
 
 
@@ -83,9 +84,46 @@ def test_habilidad_factory_exito():
     assert isinstance(ataque_especial, AtaqueEspecial)
 
 
+def test_habilidad_factory_reutiliza_instancias():
+    """Las habilidades no tienen estado: la factory devuelve siempre la misma instancia."""
+    factory = HabilidadFactory()
+
+    assert factory.get_habilidad("ataque_normal") is factory.get_habilidad("ataque_normal")
+
+
 def test_habilidad_factory_falla():
     """Prueba que la factory lance un error si la habilidad no existe."""
     factory = HabilidadFactory()
 
     with pytest.raises(ValueError, match="Habilidad 'ataque_laser' desconocida."):
-        factory.get_habilidad("ataque_laser")
\ No newline at end of file
+        factory.get_habilidad("ataque_laser")
+
+def test_simular_batalla_reproducible_con_semilla(heroe_atacante, villano_defensor):
+    """La misma semilla produce la misma batalla, se construya o no el log."""
+    ganador, log = battle_service.simular_batalla(heroe_atacante, villano_defensor, semilla=1234, con_log=True)
+    ganador_sin_log, log_vacio = battle_service.simular_batalla(heroe_atacante, villano_defensor, semilla=1234)
+
+    assert ganador.id == ganador_sin_log.id
+    assert log_vacio == []
+    assert log[0] == "¡Comienza la simulación entre Luke y Vader!"
+    assert log[-1] == f"¡{ganador.nombre} ha ganado la batalla!"
+    assert battle_service.simular_batalla(heroe_atacante, villano_defensor, semilla=1234, con_log=True)[1] == log
+
+
+def test_tabla_daño(heroe_atacante, villano_defensor):
+    """La tabla guarda el daño base y los extremos tras el factor aleatorio."""
+    tabla = battle_service.tabla_daño(heroe_atacante, villano_defensor)
+
+    assert tabla.ataque_normal == (70, 59, 80)
+    assert tabla.ataque_especial == (170, 144, 195)
+    assert battle_service.tabla_daño_por_stats(100, 200, 750) is tabla
+
+
+def test_tabla_daño_extremos_alcanzables(heroe_atacante, villano_defensor):
+    """Ningún ataque sin esquivar se sale del rango precalculado."""
+    tabla = battle_service.tabla_daño(heroe_atacante, villano_defensor)
+    rng = random.Random(5)
+    daños = {AtaqueNormal().tirar_daño(tabla, rng) for _ in range(5000)} - {0}
+
+    assert min(daños) >= tabla.ataque_normal.minimo
+    assert max(daños) <= tabla.ataque_normal.maximo
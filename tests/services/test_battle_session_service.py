@@ -0,0 +1,116 @@
+import fakeredis
+import pytest
+from unittest.mock import patch
+from src.Guerras_Clon.services import battle_session_service, swapi_service
+from src.Guerras_Clon.services.battle_session_service import SesionBatalla, MAX_LOG_BATALLA
+
+
+@pytest.fixture
+def luke():
+    return swapi_service.DATOS_PERSONAJES[0]
+
+
+@pytest.fixture
+def vader():
+    return next(p for p in swapi_service.DATOS_PERSONAJES if p.id == "vader")
+
+
+def test_sesion_compacta(luke, vader):
+    """La sesión solo guarda ids, HP y flags, sin __dict__."""
+    sesion = SesionBatalla("batalla_1", "yoda", luke, vader)
+
+    assert not hasattr(sesion, "__dict__")
+    assert (sesion.jugador_id, sesion.oponente_id) == ("luke", "vader")
+    assert (sesion.hp_jugador, sesion.hp_oponente) == (670, 690)
+    assert list(sesion.log) == ["¡Comienza la batalla entre Luke Skywalker y Darth Vader!"]
+
+
+def test_resolver_turno_especial_ya_usado(luke, vader):
+    """Si el especial ya se usó, se sustituye por un ataque normal."""
+    sesion = SesionBatalla("batalla_1", "yoda", luke, vader)
+    sesion.especial_jugador = True
+
+    with patch("random.random", return_value=0.99), patch("random.uniform", return_value=1.0):
+        battle_session_service.resolver_turno(sesion, luke, vader, "ataque_especial")
+
+    assert sesion.log[1] == "Luke Skywalker intenta usar su ataque especial, ¡pero ya lo ha usado!"
+    assert sesion.hp_oponente == 690 - (85 - 690 // 25)
+    assert sesion.hp_jugador == 670 - (100 - 670 // 25)
+    assert not sesion.terminada
+
+
+def test_log_limitado(luke, vader):
+    """El log conserva solo las últimas entradas."""
+    sesion = SesionBatalla("batalla_1", "yoda", luke, vader)
+    sesion.hp_jugador = sesion.hp_oponente = 10 ** 9
+
+    with patch("random.random", return_value=0.99):
+        for _ in range(MAX_LOG_BATALLA):
+            battle_session_service.resolver_turno(sesion, luke, vader, "ataque_normal")
+
+    assert len(sesion.log) == MAX_LOG_BATALLA
+    assert not sesion.log[0].startswith("¡Comienza")
+
+
+async def test_almacen_ids_unicos_y_capacidad(luke, vader):
+    """Los ids no colisionan y el almacén no supera su capacidad."""
+    almacen = battle_session_service.AlmacenBatallasMemoria(max_batallas=100, ttl_segundos=60)
+
+    sesiones = [await almacen.crear("yoda", luke, vader) for _ in range(150)]
+
+    assert len({s.id_batalla for s in sesiones}) == 150
+    assert len(almacen) == 100
+    assert await almacen.obtener(sesiones[0].id_batalla) is None
+    assert (await almacen.obtener(sesiones[-1].id_batalla)).a_dict() == sesiones[-1].a_dict()
+
+
+@pytest.fixture(params=["memoria", "redis"])
+def almacen(request):
+    if request.param == "memoria":
+        return battle_session_service.AlmacenBatallasMemoria()
+    return battle_session_service.AlmacenBatallasRedis(fakeredis.FakeAsyncRedis())
+
+
+async def test_almacen_finalizar(almacen, luke, vader):
+    """Las batallas terminadas se retiran del almacén."""
+    sesion = await almacen.crear("yoda", luke, vader)
+
+    await almacen.finalizar(sesion.id_batalla)
+
+    assert await almacen.obtener(sesion.id_batalla) is None
+
+
+async def test_almacen_guardar_y_recuperar(almacen, luke, vader):
+    """Lo guardado tras un turno se recupera igual, incluido el log."""
+    sesion = await almacen.crear("yoda", luke, vader)
+    battle_session_service.resolver_turno(sesion, luke, vader, "ataque_normal")
+
+    await almacen.guardar(sesion)
+    recuperada = await almacen.obtener(sesion.id_batalla)
+
+    assert recuperada.version == 1
+    assert recuperada.a_dict() == sesion.a_dict()
+
+
+async def test_almacen_conflicto_turnos_simultaneos(almacen, luke, vader):
+    """Si dos peticiones leen la misma versión, solo la primera puede guardar."""
+    sesion = await almacen.crear("yoda", luke, vader)
+    peticion_1 = await almacen.obtener(sesion.id_batalla)
+    peticion_2 = await almacen.obtener(sesion.id_batalla)
+
+    await almacen.guardar(peticion_1)
+
+    with pytest.raises(battle_session_service.ConflictoSesionError):
+        await almacen.guardar(peticion_2)
+    assert (await almacen.obtener(sesion.id_batalla)).version == 1
+
+
+async def test_almacen_entrega_copias(almacen, luke, vader):
+    """Modificar una sesión obtenida no cambia la guardada hasta llamar a guardar."""
+    sesion = await almacen.crear("yoda", luke, vader)
+    leida = await almacen.obtener(sesion.id_batalla)
+    battle_session_service.resolver_turno(leida, luke, vader, "ataque_normal")
+
+    guardada = await almacen.obtener(sesion.id_batalla)
+    assert guardada.hp_oponente == sesion.hp_oponente
+    assert list(guardada.log) == list(sesion.log)
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from unittest.mock import patch
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.Guerras_Clon.bd import models
+from src.Guerras_Clon.bd.database import Base
+from src.Guerras_Clon.services import leaderboard_service
+
+AHORA = datetime.now(timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def cache_vacia():
+    leaderboard_service.invalidar()
+    yield
+    leaderboard_service.invalidar()
+
+
+@pytest.fixture
+async def db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'leaderboard.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with sessionmaker(bind=engine, class_=AsyncSession)() as session:
+        yield session
+    await engine.dispose()
+
+
+async def _crear_torneos(db, duraciones_y_antiguedad, con_duracion=True):
+    usuario = models.User(username="yoda", email="yoda@example.com", hashed_password="x")
+    db.add(usuario)
+    await db.flush()
+    for i, (duracion, antiguedad) in enumerate(duraciones_y_antiguedad):
+        fin = AHORA - antiguedad
+        db.add(models.Tournament(name=f"T{i}", status="completed", winner_id=usuario.id,
+                                 start_time=fin - timedelta(seconds=duracion), end_time=fin,
+                                 duration_seconds=duracion if con_duracion else None))
+    await db.commit()
+
+
+async def test_leaderboard_por_ventana(db):
+    """Cada ventana ordena por duración solo los torneos terminados dentro de ella."""
+    await _crear_torneos(db, [(30, timedelta(days=3)), (10, timedelta(days=10)), (50, timedelta(hours=1))])
+
+    nombres = {v: [e["tournament_name"] for e in await leaderboard_service.obtener_leaderboard(db, v)]
+               for v in leaderboard_service.VENTANAS}
+
+    assert nombres == {"all": ["T1", "T0", "T2"], "week": ["T0", "T2"], "day": ["T2"]}
+
+
+async def test_leaderboard_cacheado_y_actualizado_al_terminar(db):
+    """Tras la primera consulta se sirve de la caché, que incorpora los torneos que terminan."""
+    await _crear_torneos(db, [(30, timedelta(hours=1))])
+    await leaderboard_service.obtener_leaderboard(db, "day")
+
+    leaderboard_service.registrar_finalizado({"tournament_name": "Nuevo", "winner_name": "yoda",
+                                              "duration_seconds": 5.0, "completed_at": AHORA})
+    with patch.object(leaderboard_service, "_consultar", side_effect=AssertionError("no debería consultar")):
+        entradas = await leaderboard_service.obtener_leaderboard(db, "day")
+
+    assert [e["tournament_name"] for e in entradas] == ["Nuevo", "T0"]
+
+
+async def test_rellenar_duraciones(db):
+    """Los torneos terminados sin duración guardada la obtienen de start_time y end_time."""
+    await _crear_torneos(db, [(42, timedelta(hours=1))], con_duracion=False)
+
+    assert await leaderboard_service.rellenar_duraciones(db) == 1
+    entradas = await leaderboard_service.obtener_leaderboard(db)
+    assert entradas[0]["duration_seconds"] == pytest.approx(42)
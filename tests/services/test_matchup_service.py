@@ -0,0 +1,51 @@
+import pytest
+from unittest.mock import patch
+from src.Guerras_Clon.services import matchup_service, swapi_service, battle_service
+
+
+@pytest.fixture(autouse=True)
+def limpiar_cache():
+    matchup_service._matrices_cacheadas.clear()
+    yield
+    matchup_service._matrices_cacheadas.clear()
+
+
+def test_calcular_matriz_forma():
+    """La matriz debe ser cuadrada y contener probabilidades válidas."""
+    personajes = swapi_service.DATOS_PERSONAJES[:3]
+
+    matriz = matchup_service.calcular_matriz(personajes)
+
+    assert matriz.personajes == ["luke", "obiwan", "r2d2"]
+    assert len(matriz.probabilidades) == 3
+    assert all(len(fila) == 3 for fila in matriz.probabilidades)
+    assert all(0.0 <= p <= 1.0 for fila in matriz.probabilidades for p in fila)
+
+
+def test_huella_cambia_con_reglas():
+    """Cambiar la versión de las reglas debe invalidar la matriz."""
+    huella = matchup_service.calcular_huella(swapi_service.DATOS_PERSONAJES)
+
+    with patch.object(battle_service, "VERSION_REGLAS", battle_service.VERSION_REGLAS + 1):
+        assert matchup_service.calcular_huella(swapi_service.DATOS_PERSONAJES) != huella
+
+
+@pytest.mark.asyncio
+async def test_obtener_matriz_matchups_usa_cache():
+    """La matriz se calcula una sola vez mientras no cambie la huella."""
+    personajes = swapi_service.DATOS_PERSONAJES[:2]
+    matriz = matchup_service.calcular_matriz(personajes)
+
+    with patch.object(swapi_service, "get_all_characters", return_value=personajes), \
+            patch.object(matchup_service, "calcular_matriz", return_value=matriz) as calcular:
+        primera = await matchup_service.obtener_matriz_matchups()
+        segunda = await matchup_service.obtener_matriz_matchups()
+
+    assert primera is segunda
+    calcular.assert_called_once()
+
+
+def test_motor_desconocido():
+    """Prueba que se rechace un motor que no existe."""
+    with pytest.raises(ValueError, match="Motor 'dados' desconocido."):
+        matchup_service.calcular_matriz(swapi_service.DATOS_PERSONAJES[:2], motor="dados")
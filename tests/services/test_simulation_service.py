@@ -0,0 +1,38 @@
+import random
+import numpy as np
+from src.Guerras_Clon.services import battle_service, simulation_service, swapi_service
+
+
+def _personaje(character_id):
+    return next(p for p in swapi_service.DATOS_PERSONAJES if p.id == character_id)
+
+
+def test_simular_batallas_forma_y_determinismo():
+    """Prueba que devuelva un resultado por batalla y que la semilla lo haga reproducible."""
+    luke, vader = _personaje("luke"), _personaje("vader")
+
+    resultado = simulation_service.simular_batallas(luke, vader, 500, semilla=7)
+
+    assert resultado.shape == (500,)
+    assert resultado.dtype == np.bool_
+    assert np.array_equal(resultado, simulation_service.simular_batallas(luke, vader, 500, semilla=7))
+
+
+def test_simular_batallas_personaje_muy_superior():
+    """Un personaje que casi no hace daño (mínimo 1) debe perder siempre."""
+    r2d2, wampa = _personaje("r2d2"), _personaje("wampa")
+
+    assert simulation_service.probabilidad_victoria(r2d2, wampa, 2000, semilla=1) == 0.0
+    assert simulation_service.probabilidad_victoria(wampa, r2d2, 2000, semilla=1) == 1.0
+
+
+def test_motor_vectorizado_coincide_con_simulacion_por_turnos():
+    """Compara la probabilidad de victoria con el bucle por turnos de simular_batalla."""
+    luke, vader = _personaje("luke"), _personaje("vader")
+    random.seed(42)
+    n = 4000
+
+    victorias_bucle = sum(battle_service.simular_batalla(luke, vader)[0].id == "luke" for _ in range(n)) / n
+    victorias_vectorizado = simulation_service.probabilidad_victoria(luke, vader, 50000, semilla=42)
+
+    assert abs(victorias_bucle - victorias_vectorizado) < 0.04
@@ -0,0 +1,62 @@
+import random
+import time
+import pytest
+from src.Guerras_Clon.services import battle_service, solver_service, simulation_service, swapi_service
+
+
+def _personaje(character_id):
+    return next(p for p in swapi_service.DATOS_PERSONAJES if p.id == character_id)
+
+
+@pytest.mark.parametrize("daño_base", [-24, 0, 1, 7, 46, 180])
+def test_distribucion_daño_suma_uno(daño_base):
+    """La distribución de daño debe sumar 1 y nunca dar menos de 1 de daño."""
+    pmf = solver_service.distribucion_daño(daño_base)
+
+    assert pmf.sum() == pytest.approx(1.0)
+    assert pmf[0] == 0.0
+
+
+def test_distribucion_daño_rango():
+    """Con base 100 el daño va de 85 a 114 (el factor 1.15 nunca se alcanza)."""
+    pmf = solver_service.distribucion_daño(100)
+
+    soporte = [k for k, p in enumerate(pmf) if p > 0]
+    assert soporte[0] == 85
+    assert soporte[-1] == 114
+
+
+def test_solver_coincide_con_simular_batalla():
+    """Compara la solución exacta con el bucle por turnos de simular_batalla."""
+    luke, vader = _personaje("luke"), _personaje("vader")
+    random.seed(3)
+    n = 4000
+
+    victorias = sum(battle_service.simular_batalla(luke, vader)[0].id == "luke" for _ in range(n)) / n
+
+    assert abs(solver_service.probabilidad_victoria_exacta(luke, vader) - victorias) < 0.04
+
+
+@pytest.mark.parametrize("id_1, id_2", [("luke", "luke"), ("han", "palpatine"), ("wampa", "chewie")])
+def test_solver_coincide_con_monte_carlo(id_1, id_2):
+    """Con muchas muestras el motor vectorizado debe acercarse a la probabilidad exacta."""
+    p1, p2 = _personaje(id_1), _personaje(id_2)
+
+    exacta = solver_service.probabilidad_victoria_exacta(p1, p2)
+    estimada = simulation_service.probabilidad_victoria(p1, p2, 200000, semilla=11)
+
+    assert abs(exacta - estimada) < 0.006
+
+
+def test_solver_roster_completo_rapido():
+    """La matriz completa del roster debe resolverse en menos de un segundo."""
+    solver_service._probabilidad_victoria.cache_clear()
+    solver_service._cadena.cache_clear()
+    personajes = swapi_service.DATOS_PERSONAJES
+
+    inicio = time.perf_counter()
+    for p1 in personajes:
+        for p2 in personajes:
+            solver_service.probabilidad_victoria_exacta(p1, p2)
+
+    assert time.perf_counter() - inicio < 1.0
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.Guerras_Clon.bd import models
+from src.Guerras_Clon.bd.database import Base
+from src.Guerras_Clon.services import stats_service
+
+HORA = datetime(2025, 3, 1, 10, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with sessionmaker(bind=engine, class_=AsyncSession)() as session:
+        yield session
+    await engine.dispose()
+
+
+def _entrada(minutos, action):
+    return {"timestamp": HORA + timedelta(minutes=minutos), "username": "yoda", "action": action, "details": ""}
+
+
+async def test_registrar_eventos_agrega_por_hora(db):
+    """Los eventos se suman por (hora, acción) y al total, también entre lotes."""
+    await stats_service.registrar_eventos(db, [_entrada(1, "USER_LOGIN"), _entrada(59, "USER_LOGIN"),
+                                               _entrada(61, "USER_LOGIN"), _entrada(5, "JOIN_TOURNAMENT")])
+    await stats_service.registrar_eventos(db, [_entrada(30, "USER_LOGIN")])
+    await db.commit()
+
+    actividad = await stats_service.obtener_actividad(db, HORA, HORA + timedelta(hours=2))
+
+    assert [(a.action, a.count) for a in actividad] == [("JOIN_TOURNAMENT", 1), ("USER_LOGIN", 3), ("USER_LOGIN", 1)]
+    assert (await stats_service.obtener_contadores(db))[stats_service.CONTADOR_AUDITORIA] == 5
+
+
+async def test_inicializar_recalcula_usuarios(db):
+    """Al arrancar, el total de usuarios se recalcula aunque el contador ya exista."""
+    await stats_service.incrementar(db, stats_service.CONTADOR_USUARIOS, 7)
+    db.add(models.User(username="yoda", email="yoda@example.com", hashed_password="x"))
+    await db.commit()
+
+    await stats_service.inicializar(db)
+
+    contadores = await stats_service.obtener_contadores(db)
+    assert contadores == {stats_service.CONTADOR_USUARIOS: 1, stats_service.CONTADOR_AUDITORIA: 0}
+
+
+async def test_contador_de_auditoria_fragmentado(db):
+    """Los eventos se reparten entre varias filas del contador y al leer se suman."""
+    for _ in range(40):
+        await stats_service.registrar_eventos(db, [_entrada(1, "USER_LOGIN")])
+    await stats_service.incrementar(db, stats_service.CONTADOR_AUDITORIA, -5)
+    await db.commit()
+
+    filas = (await db.execute(select(models.StatsCounter.name))).scalars().all()
+    assert len(filas) > 1 and all(f.startswith(stats_service.CONTADOR_AUDITORIA) for f in filas)
+    assert (await stats_service.obtener_contadores(db))[stats_service.CONTADOR_AUDITORIA] == 35
+
+    await stats_service.inicializar(db)
+    assert (await stats_service.obtener_contadores(db))[stats_service.CONTADOR_AUDITORIA] == 35
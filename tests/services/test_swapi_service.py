@@ -1,3 +1,4 @@
+import json
 import pytest
 from src.Guerras_Clon.services import swapi_service
 from src.Guerras_Clon.api.schemas.star_wars_models import Mundo, Personaje
@@ -53,4 +54,85 @@ async def test_get_all_characters():
     todos = await swapi_service.get_all_characters()
     assert isinstance(todos, list)
     assert len(todos) > 0  # Basado en tus datos, hay 18
-    assert len(todos) == 18
\ No newline at end of file
+    assert len(todos) == 18
+
+def test_catalogo_indices():
+    """Los índices del catálogo coinciden con filtrar la lista completa."""
+    catalogo = swapi_service.obtener_catalogo()
+
+    assert len(catalogo) == len(swapi_service.DATOS_PERSONAJES)
+    assert catalogo.obtener("vader").nombre == "Darth Vader"
+    for mundo_id in swapi_service.DATOS_MUNDOS:
+        assert catalogo.de_mundo(mundo_id) == tuple(p for p in swapi_service.DATOS_PERSONAJES if p.mundo_id == mundo_id)
+        for tipo in ("heroe", "villano"):
+            esperados = tuple(p for p in catalogo.de_mundo(mundo_id) if p.tipo == tipo)
+            assert catalogo.de_mundo_y_tipo(mundo_id, tipo) == esperados
+            assert catalogo.seleccion(mundo_id, tipo) == esperados[:swapi_service.PERSONAJES_POR_BANDO]
+    assert catalogo.de_mundo_y_tipo(99, "heroe") == ()
+
+
+def test_catalogo_inmutable():
+    """El índice por id no se puede modificar desde fuera."""
+    catalogo = swapi_service.obtener_catalogo()
+
+    with pytest.raises(TypeError):
+        catalogo.por_id["jarjar"] = catalogo.obtener("luke")
+
+
+@pytest.fixture
+def fichero_catalogo(tmp_path, monkeypatch):
+    """Copia del catálogo en un fichero temporal que la prueba puede modificar."""
+    ruta = tmp_path / "catalogo.json"
+    ruta.write_bytes(swapi_service.RUTA_CATALOGO_POR_DEFECTO.read_bytes())
+    monkeypatch.setattr(swapi_service, "_ruta_catalogo", ruta)
+    monkeypatch.setattr(swapi_service, "_catalogo", swapi_service.obtener_catalogo())
+    monkeypatch.setattr(swapi_service, "_firma_catalogo", None)
+    return ruta
+
+
+def test_cargar_catalogo_desde_fichero():
+    """El fichero de datos se valida en los esquemas y la versión depende del contenido."""
+    catalogo = swapi_service.cargar_catalogo(swapi_service.RUTA_CATALOGO_POR_DEFECTO)
+
+    assert catalogo.mundos[1].imagen == f"{swapi_service.BASE_URL_FRONTEND}/tatooine.png"
+    assert catalogo.obtener("luke").info.defensa == 670
+    assert catalogo.version == swapi_service.obtener_catalogo().version
+
+
+def test_recargar_catalogo(fichero_catalogo):
+    """Al cambiar el fichero se publica un catálogo nuevo y el anterior sigue intacto."""
+    anterior = swapi_service.obtener_catalogo()
+    assert not swapi_service.recargar_catalogo()
+
+    datos = json.loads(fichero_catalogo.read_text(encoding="utf-8"))
+    datos["personajes"][0]["info"]["daño"] = 999
+    fichero_catalogo.write_text(json.dumps(datos), encoding="utf-8")
+
+    assert swapi_service.recargar_catalogo(forzar=True)
+    assert swapi_service.obtener_catalogo().obtener("luke").info.daño == 999
+    assert swapi_service.obtener_catalogo().version != anterior.version
+    assert anterior.obtener("luke").info.daño == 85
+
+
+def test_recargar_catalogo_invalido_conserva_el_anterior(fichero_catalogo):
+    """Un fichero incoherente no sustituye al catálogo vigente."""
+    anterior = swapi_service.obtener_catalogo()
+    datos = json.loads(fichero_catalogo.read_text(encoding="utf-8"))
+    datos["personajes"][0]["mundo_id"] = 99
+    fichero_catalogo.write_text(json.dumps(datos), encoding="utf-8")
+
+    with pytest.raises(ValueError, match="mundo inexistente"):
+        swapi_service.recargar_catalogo(forzar=True)
+    assert swapi_service.obtener_catalogo() is anterior
+
+
+def test_recargar_catalogo_sin_un_personaje_conserva_el_anterior(fichero_catalogo):
+    """Quitar o renombrar un id en uso no se publica: lo siguen usando los datos guardados."""
+    anterior = swapi_service.obtener_catalogo()
+    datos = json.loads(fichero_catalogo.read_text(encoding="utf-8"))
+    datos["personajes"][0]["id"] = "luke_skywalker"
+    fichero_catalogo.write_text(json.dumps(datos), encoding="utf-8")
+
+    with pytest.raises(ValueError, match="luke"):
+        swapi_service.recargar_catalogo(forzar=True)
+    assert swapi_service.obtener_catalogo() is anterior
@@ -0,0 +1,61 @@
+import json
+import random
+from types import SimpleNamespace
+import pytest
+from src.Guerras_Clon.services import swapi_service, tournament_service
+
+
+def test_sembrar_participantes():
+    """El cuadro tiene 16 personajes únicos e incluye al del jugador."""
+    luke = swapi_service.DATOS_PERSONAJES[0]
+
+    participantes = tournament_service.sembrar_participantes(luke, swapi_service.DATOS_PERSONAJES, random.Random(1))
+
+    assert len(participantes) == tournament_service.MAX_PARTICIPANTS
+    assert len({p.id for p in participantes}) == tournament_service.MAX_PARTICIPANTS
+    assert luke in participantes
+
+
+def test_sembrar_participantes_sin_bots_suficientes():
+    """Debe fallar si no hay 15 personajes distintos para los bots."""
+    personajes = swapi_service.DATOS_PERSONAJES[:10]
+
+    with pytest.raises(ValueError, match="No hay suficientes personajes únicos para los bots."):
+        tournament_service.sembrar_participantes(personajes[0], personajes)
+
+
+def test_resolver_bracket():
+    """Un cuadro de 16 se resuelve en 4 rondas de 8, 4, 2 y 1 ganadores."""
+    participantes = swapi_service.DATOS_PERSONAJES[:16]
+
+    rondas = tournament_service.resolver_bracket(participantes, lambda p1, p2: p1)
+
+    assert [len(r) for r in rondas] == [8, 4, 2, 1]
+    assert rondas[-1] == [participantes[0]]
+
+
+def test_compactar_y_expandir_bracket():
+    """El cuadro compacto conserva participantes, partidos, jugadores y ganadores."""
+    participantes = [SimpleNamespace(id=100 + i, character_id=f"p{i}", user_id=7 if i == 5 else None,
+                                     ai_name=None if i == 5 else f"IA {i}") for i in range(16)]
+    # Siembra desordenada respecto a los ids: el orden lo marca la primera ronda.
+    orden = [p.id for p in reversed(participantes)]
+    partidos = [SimpleNamespace(id=i + 1, round=1, match_index=i, player1_id=orden[i * 2],
+                                player2_id=orden[i * 2 + 1], winner_id=orden[i * 2], status="completed")
+                for i in range(8)]
+    partidos += [SimpleNamespace(id=9 + i, round=2, match_index=i, player1_id=orden[i * 4],
+                                 player2_id=orden[i * 4 + 2], winner_id=orden[i * 4 + 2] if i == 0 else None,
+                                 status="completed" if i == 0 else "pending")
+                 for i in range(4)]
+
+    bracket = tournament_service.compactar_bracket(participantes, partidos)
+    expandidos_p, expandidos_m = tournament_service.expandir_bracket(json.loads(json.dumps(bracket)))
+
+    assert [p["id"] for p in expandidos_p] == orden
+    assert {(p["id"], p["user_id"], p["ai_name"]) for p in expandidos_p} == \
+           {(p.id, p.user_id, p.ai_name) for p in participantes}
+    assert expandidos_m == [
+        {"id": m.id, "round": m.round, "match_index": m.match_index, "player1_id": m.player1_id,
+         "player2_id": m.player2_id, "winner_id": m.winner_id, "status": m.status}
+        for m in partidos
+    ]
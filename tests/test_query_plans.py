@@ -0,0 +1,25 @@
+from sqlalchemy.ext.asyncio import create_async_engine
+from src import query_plans
+
+
+def test_escaneos_secuenciales_por_dialecto():
+    """Detecta los recorridos completos de tabla en los planes de SQLite y PostgreSQL."""
+    assert query_plans.escaneos_secuenciales("sqlite", ["SCAN tournaments", "SEARCH users USING INTEGER PRIMARY KEY (rowid=?)"]) == ["tournaments"]
+    assert query_plans.escaneos_secuenciales("postgresql", [
+        "Nested Loop  (cost=0.29..16.34 rows=1 width=8)",
+        "  ->  Seq Scan on tournament_matches  (cost=0.00..8.30 rows=1 width=4)",
+        "  ->  Index Scan using users_pkey on users  (cost=0.29..8.30 rows=1 width=4)",
+    ]) == ["tournament_matches"]
+
+
+async def test_consultas_criticas_usan_indices(tmp_path):
+    """Con datos sembrados, ninguna consulta crítica recorre una tabla entera."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'planes.db'}")
+    datos = await query_plans.sembrar(engine, n_torneos=300, n_usuarios=100)
+    informe = await query_plans.capturar_planes(engine, datos)
+    await engine.dispose()
+
+    consultas = {entrada["consulta"] for entrada in informe}
+    assert consultas == {"torneos_abiertos", "detalle_torneo", "leaderboard", "leaderboard_semana",
+                         "verificar_registro", "simular_partido"}
+    assert [(e["consulta"], e["escaneos"]) for e in informe if e["escaneos"]] == []